@@ -0,0 +1,96 @@
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SCORE_RANGE = range(1, 11)
+
+
+def rating_counters(rating: Optional[dict], weight: int = 1) -> Counter:
+    """Counter contributions of one rating row (weight -1 takes a previous version back out)"""
+    counters = Counter()
+    if not rating:
+        return counters
+    score = rating.get("score")
+    if score is not None:
+        counters["score_count"] += weight
+        counters["score_sum"] += weight * score
+        counters[f"histogram.{score}"] += weight
+    if rating.get("liked") is True:
+        counters["likes"] += weight
+    elif rating.get("liked") is False:
+        counters["dislikes"] += weight
+    return counters
+
+
+def rating_delta(before: Optional[dict], after: Optional[dict]) -> Dict[str, int]:
+    """$inc document turning the stats for `before` into the stats for `after`"""
+    delta = rating_counters(before, -1)
+    delta.update(rating_counters(after))
+    return {field: value for field, value in delta.items() if value}
+
+
+def flatten(doc: Optional[dict]) -> Dict[str, int]:
+    """Stored anime_stats document as the non-zero counters rating_delta produces"""
+    if not doc:
+        return {}
+    counters = {field: doc.get(field, 0) for field in ("score_count", "score_sum", "likes", "dislikes", "review_count")}
+    for score, count in (doc.get("histogram") or {}).items():
+        counters[f"histogram.{score}"] = count
+    return {field: value for field, value in counters.items() if value}
+
+
+def expand(counters: Dict[str, int]) -> Dict[str, Any]:
+    """Inverse of flatten: nested fields as stored in anime_stats"""
+    doc = {field: counters.get(field, 0) for field in ("score_count", "score_sum", "likes", "dislikes", "review_count")}
+    doc["histogram"] = {
+        field.split(".", 1)[1]: value for field, value in counters.items() if field.startswith("histogram.")
+    }
+    return doc
+
+
+def public_stats(doc: Optional[dict]) -> Dict[str, Any]:
+    counters = flatten(doc)
+    score_count = counters.get("score_count", 0)
+    return {
+        "average_score": round(counters.get("score_sum", 0) / score_count, 2) if score_count else None,
+        "score_count": score_count,
+        "likes": counters.get("likes", 0),
+        "dislikes": counters.get("dislikes", 0),
+        "review_count": counters.get("review_count", 0),
+        "histogram": {str(score): counters.get(f"histogram.{score}", 0) for score in SCORE_RANGE},
+    }
+
+
+async def apply_delta(db, anime_id: str, delta: Dict[str, int]) -> None:
+    """Apply counter deltas atomically; a failure is logged and left for reconcile_anime_stats.py"""
+    if not delta:
+        return
+    try:
+        await db.anime_stats.update_one(
+            {"anime_id": anime_id},
+            {"$inc": delta, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+    except Exception as e:
+        logger.error(f"Failed to update anime_stats for {anime_id} with {delta}: {e}")
+
+
+async def compute_all(db) -> Dict[str, Dict[str, int]]:
+    """Recompute every title's counters from ratings and reviews, keyed by anime_id"""
+    stats: Dict[str, Counter] = {}
+    ratings = db.ratings.aggregate([
+        {"$group": {
+            "_id": {"anime_id": "$anime_id", "score": "$score", "liked": "$liked"},
+            "count": {"$sum": 1}
+        }}
+    ], allowDiskUse=True)
+    async for group in ratings:
+        key = group["_id"]
+        stats.setdefault(key["anime_id"], Counter()).update(rating_counters(key, group["count"]))
+    reviews = db.reviews.aggregate([{"$group": {"_id": "$anime_id", "count": {"$sum": 1}}}])
+    async for group in reviews:
+        stats.setdefault(group["_id"], Counter())["review_count"] += group["count"]
+    return {anime_id: {f: v for f, v in counters.items() if v} for anime_id, counters in stats.items()}
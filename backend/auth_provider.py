@@ -0,0 +1,62 @@
+import importlib.util
+import time
+from typing import Any, Dict
+
+import httpx
+
+
+class AuthProvider:
+    """App-lifetime HTTP client for the OAuth session exchange
+
+    One pooled AsyncClient keeps connections to the provider alive between
+    logins, so only the first login (or the first after keepalive_expiry)
+    pays for the TCP and TLS handshake. HTTP/2 is negotiated when the h2
+    package is installed, multiplexing concurrent logins over one connection.
+    """
+
+    def __init__(
+        self,
+        session_data_url: str,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 10.0,
+    ):
+        self.session_data_url = session_data_url
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        )
+        self.requests = 0
+        self.errors = 0
+        self._total_ms = 0.0
+
+    async def session_data(self, session_id: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        self.requests += 1
+        try:
+            resp = await self.client.get(self.session_data_url, headers={"X-Session-ID": session_id})
+            resp.raise_for_status()
+            return resp.json()
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._total_ms += (time.perf_counter() - started) * 1000
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_ms": round(self._total_ms / self.requests, 2) if self.requests else None,
+        }
@@ -0,0 +1,75 @@
+"""Per-login latency of the OAuth session exchange: a new client per login vs the shared pooled client
+
+Run from the backend directory: python bench_auth_client.py [--logins 200] [--url URL]
+Without --url a local stub server is used, which only shows the TCP connect
+saving; point --url at a TLS endpoint to include the handshake.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from auth_provider import AuthProvider
+from stub_auth_server import StubAuthServer
+
+
+async def per_login_client(url, logins):
+    timings = []
+    for i in range(logins):
+        started = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            resp = await client.get(url, headers={"X-Session-ID": f"bench{i}"}, timeout=10.0)
+            resp.raise_for_status()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def shared_client(url, logins):
+    provider = AuthProvider(url)
+    timings = []
+    try:
+        for i in range(logins):
+            started = time.perf_counter()
+            await provider.session_data(f"bench{i}")
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        await provider.aclose()
+    return timings
+
+
+def summary(timings):
+    ordered = sorted(timings)
+    p99 = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+    return f"p50 {statistics.median(ordered):.2f} ms, p99 {p99:.2f} ms"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared auth provider client")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--url", help="session-data endpoint to hit instead of the local stub")
+    args = parser.parse_args()
+
+    stub = None
+    url = args.url
+    if url is None:
+        stub = StubAuthServer().start()
+        url = stub.session_data_url
+
+    fresh = await per_login_client(url, args.logins)
+    if stub:
+        fresh_connections, stub.connections = stub.connections, 0
+    shared = await shared_client(url, args.logins)
+
+    print(f"✓ New client per login: {summary(fresh)}")
+    print(f"✓ Shared pooled client: {summary(shared)}")
+    if stub:
+        print(f"✓ Connections opened: {fresh_connections} vs {stub.connections}")
+        stub.stop()
+    saved = statistics.median(fresh) - statistics.median(shared)
+    print(f"\n✅ Median saving per login: {saved:.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""Search latency benchmark on a synthetic catalog
+
+Run from the backend directory: python bench_search.py [--titles 100000] [--p99-target-ms 10]
+Exits non-zero when the measured p99 misses the target.
+"""
+import argparse
+import random
+import sys
+import time
+
+from fuzzy_index import FuzzyIndex
+from search_index import SearchIndex
+
+SYLLABLES = [
+    "ka", "ki", "ku", "ke", "ko", "sa", "shi", "su", "se", "so", "ta", "chi", "tsu", "te", "to",
+    "na", "ni", "nu", "ne", "no", "ha", "hi", "fu", "he", "ho", "ma", "mi", "mu", "me", "mo",
+    "ya", "yu", "yo", "ra", "ri", "ru", "re", "ro", "wa", "n", "ga", "gi", "go", "za", "ji", "da", "ba", "bo",
+]
+ENGLISH = [
+    "attack", "titan", "hunter", "sword", "online", "hero", "academia", "demon", "slayer", "ghoul",
+    "death", "note", "spirit", "away", "blade", "knight", "dragon", "ball", "piece", "chainsaw", "man",
+    "kingdom", "star", "night", "school", "love", "war", "game", "ninja", "saga", "chronicles", "tale",
+]
+GENRES = ["Action", "Adventure", "Comedy", "Drama", "Fantasy", "Horror", "Romance", "Sci-Fi", "Shounen", "Slice of Life"]
+STUDIOS = ["Toei Animation", "MAPPA", "Bones", "Madhouse", "Wit Studio", "Ufotable", "Kyoto Animation", "Sunrise"]
+
+
+def make_word(rng):
+    if rng.random() < 0.4:
+        return rng.choice(ENGLISH)
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def make_catalog(n, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "anime_id": f"anime_{i:08d}",
+            "title": " ".join(make_word(rng) for _ in range(rng.randint(1, 4))).title(),
+            "synopsis": " ".join(make_word(rng) for _ in range(rng.randint(15, 40))),
+            "studio": rng.choice(STUDIOS),
+            "genres": rng.sample(GENRES, 3),
+            "tags": [make_word(rng) for _ in range(3)],
+        }
+        for i in range(n)
+    ]
+
+
+def make_queries(catalog, n, seed=11):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        words = rng.choice(catalog)["title"].split()
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(rng.choice(words))
+        elif kind < 0.7:
+            queries.append(" ".join(words[:2]))
+        else:
+            # Typeahead-style partial last word
+            word = rng.choice(words)
+            queries.append(word[:max(2, len(word) // 2)])
+    return queries
+
+
+def make_typos(catalog, n, seed=13):
+    """Title words with one character substituted, as typed by someone in a hurry"""
+    rng = random.Random(seed)
+    typos = []
+    for _ in range(n):
+        word = list(rng.choice(rng.choice(catalog)["title"].split()).lower())
+        word[rng.randrange(len(word))] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        typos.append("".join(word))
+    return typos
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure SearchIndex latency on a synthetic catalog")
+    parser.add_argument("--titles", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--p99-target-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.titles)
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.rebuild(catalog)
+    print(f"Indexed {args.titles} titles in {time.perf_counter() - started:.2f}s")
+
+    updated = dict(catalog[0], title="Renamed Incremental Title")
+    started = time.perf_counter()
+    index.update([updated], [catalog[1]["anime_id"]])
+    print(f"Incremental update of 2 titles in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    latencies = []
+    for query in make_queries(catalog, args.queries):
+        started = time.perf_counter()
+        index.search(query, 10)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    p50, p95, p99 = (percentile(latencies, p) for p in (50, 95, 99))
+    print(f"{args.queries} queries: p50 {p50:.3f} ms, p95 {p95:.3f} ms, p99 {p99:.3f} ms")
+
+    fuzzy = FuzzyIndex()
+    fuzzy.rebuild(catalog)
+    fuzzy_latencies = []
+    for typo in make_typos(catalog, args.queries):
+        started = time.perf_counter()
+        fuzzy.lookup(typo)
+        fuzzy_latencies.append((time.perf_counter() - started) * 1000)
+    fuzzy_p50, fuzzy_p99 = percentile(fuzzy_latencies, 50), percentile(fuzzy_latencies, 99)
+    print(f"{args.queries} typo lookups: p50 {fuzzy_p50:.3f} ms, p99 {fuzzy_p99:.3f} ms")
+    p99 = max(p99, fuzzy_p99)
+
+    if p99 > args.p99_target_ms:
+        print(f"❌ p99 {p99:.3f} ms exceeds target {args.p99_target_ms} ms")
+        return 1
+    print(f"✅ p99 within target {args.p99_target_ms} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
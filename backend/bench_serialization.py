@@ -0,0 +1,74 @@
+"""Microbenchmark: cost of serializing 1,000 episodes, old response path vs fast path
+
+Run from the backend directory: python bench_serialization.py
+"""
+import json
+import os
+import timeit
+from datetime import datetime, timezone
+from typing import List
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "animeflix_bench")
+
+from pydantic import TypeAdapter
+
+from responses import dump_json, lean_document, orjson
+from server import Episode
+
+EPISODE_COUNT = 1000
+REPEAT = 20
+
+
+def make_episodes(n):
+    created_at = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "episode_id": f"episode_{i:012d}",
+            "anime_id": "anime_bench",
+            "season_number": 1,
+            "episode_number": i + 1,
+            "title": f"Episode {i + 1}",
+            "thumbnail_url": "https://example.com/thumb.jpg",
+            "video_url": f"https://example.com/video/ep{i + 1}.mp4",
+            "duration_seconds": 1440,
+            "skip_intro_start": 90,
+            "skip_intro_end": 180,
+            "skip_recap_start": 10,
+            "skip_recap_end": 90,
+            "created_at": created_at,
+        }
+        for i in range(n)
+    ]
+
+
+episodes_adapter = TypeAdapter(List[Episode])
+
+
+def old_path(docs):
+    # Handler loop + response_model validation + JSON-mode dump + JSONResponse.render
+    docs = [dict(d) for d in docs]
+    for e in docs:
+        if isinstance(e.get('created_at'), str):
+            e['created_at'] = datetime.fromisoformat(e['created_at'])
+    content = episodes_adapter.dump_python(episodes_adapter.validate_python(docs), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(docs):
+    return dump_json([lean_document(Episode, d) for d in docs])
+
+
+def main():
+    docs = make_episodes(EPISODE_COUNT)
+    print(f"Serializing {EPISODE_COUNT} episodes, best of {REPEAT} runs (orjson: {'yes' if orjson else 'no'})")
+    results = {}
+    for name, fn in (("old path", old_path), ("fast path", fast_path)):
+        best = min(timeit.repeat(lambda: fn(docs), number=1, repeat=REPEAT))
+        results[name] = best
+        print(f"  {name:<10} {best * 1000:8.2f} ms per {EPISODE_COUNT} episodes")
+    print(f"  speedup    {results['old path'] / results['fast path']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
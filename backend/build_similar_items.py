@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
+
+from collaborative import (
+    CHUNK_ITEMS,
+    MIN_SUPPORT,
+    SIMILAR_TOP_K,
+    InteractionMatrix,
+    item_neighbours,
+    rating_weight,
+    watch_weight,
+)
+from indexes import ensure_indexes
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+STREAM_BATCH_SIZE = 5000
+WRITE_BATCH_SIZE = 1000
+
+
+async def load_interactions(db):
+    """Stream watch history and ratings into a profile x anime preference matrix"""
+    interactions = InteractionMatrix()
+    projection = {"_id": 0, "profile_id": 1, "anime_id": 1}
+    async for doc in db.watch_history.find({}, {**projection, "completed": 1}).batch_size(STREAM_BATCH_SIZE):
+        interactions.add(doc.get("profile_id"), doc.get("anime_id"), watch_weight(doc))
+    async for doc in db.ratings.find({}, {**projection, "liked": 1, "score": 1}).batch_size(STREAM_BATCH_SIZE):
+        interactions.add(doc.get("profile_id"), doc.get("anime_id"), rating_weight(doc))
+    return interactions
+
+
+async def write_similar_items(db, interactions, matrix, args):
+    """Upsert one similar_items row per anime and drop rows this run no longer produced"""
+    anime_ids = interactions.anime_ids()
+    computed_at = datetime.now(timezone.utc)
+    batch = []
+    written = 0
+    for item, neighbours in item_neighbours(matrix, args.top_k, args.min_support, chunk=args.chunk):
+        doc = {
+            "anime_id": anime_ids[item],
+            "similar": [
+                {"anime_id": anime_ids[n], "score": round(score, 4), "support": support}
+                for n, score, support in neighbours
+            ],
+            "computed_at": computed_at,
+        }
+        batch.append(ReplaceOne({"anime_id": doc["anime_id"]}, doc, upsert=True))
+        if len(batch) >= WRITE_BATCH_SIZE:
+            await db.similar_items.bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        await db.similar_items.bulk_write(batch, ordered=False)
+        written += len(batch)
+    stale = await db.similar_items.delete_many({"computed_at": {"$lt": computed_at}})
+    return written, stale.deleted_count
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compute item-item collaborative neighbours into similar_items")
+    parser.add_argument("--top-k", type=int, default=SIMILAR_TOP_K)
+    parser.add_argument("--min-support", type=int, default=MIN_SUPPORT, help="profiles two titles must share")
+    parser.add_argument("--chunk", type=int, default=CHUNK_ITEMS, help="items per sparse product")
+    parser.add_argument("--dry-run", action="store_true", help="compute and report without writing")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    started = time.perf_counter()
+    interactions = await load_interactions(db)
+    matrix = interactions.to_csr()
+    print(f"✓ Loaded {matrix.nnz} preferences: {matrix.shape[0]} profiles x {matrix.shape[1]} anime "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    if args.dry_run:
+        titles = sum(1 for _ in item_neighbours(matrix, args.top_k, args.min_support, chunk=args.chunk))
+        print(f"✓ {titles} anime would get collaborative neighbours")
+    else:
+        await ensure_indexes(db)
+        written, removed = await write_similar_items(db, interactions, matrix, args)
+        print(f"✓ Wrote {written} similar_items rows, removed {removed} stale rows")
+        print(f"\n✅ Similar items rebuilt in {time.perf_counter() - started:.1f}s")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
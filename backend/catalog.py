@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+from responses import JSONPayload, dump_json, json_array, lean_document
+
+logger = logging.getLogger(__name__)
+
+CATALOG_META_ID = "catalog"
+
+# Catalog diffs touching at most this many titles are applied incrementally; larger ones
+# rebuild derived indexes off-loop. Absolute, since inline updates block the event loop.
+INCREMENTAL_UPDATE_LIMIT = 32
+
+EMPTY_LIST_PAYLOAD = JSONPayload(b"[]")
+
+
+async def bump_catalog_version(db) -> None:
+    """Tell every API worker that anime/episodes changed and the snapshot must be reloaded"""
+    await db.catalog_meta.update_one({"_id": CATALOG_META_ID}, {"$inc": {"version": 1}}, upsert=True)
+
+
+def _lean(model, docs: List[dict]) -> List[Dict[str, Any]]:
+    """Shape trusted catalog documents without validation, skipping incomplete ones"""
+    result = []
+    for doc in docs:
+        lean = lean_document(model, doc)
+        if lean is None:
+            logger.warning(f"Skipping incomplete {model.__name__} document in catalog snapshot: {doc.get(model.__name__.lower() + '_id')}")
+            continue
+        result.append(lean)
+    return result
+
+
+def sort_key(anime: Dict[str, Any]) -> Tuple[float, str]:
+    """Catalog order: (created_at as epoch seconds, anime_id), whether created_at is stored as text or a date"""
+    created_at = anime.get("created_at")
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            created_at = None
+    if not isinstance(created_at, datetime):
+        return (0.0, anime["anime_id"])
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return (created_at.timestamp(), anime["anime_id"])
+
+
+class CatalogSnapshot:
+    """Immutable in-memory copy of the anime and episodes collections
+
+    Documents are shaped once at build time and kept both as plain dicts and
+    as serialized JSON, together with posting lists (positions in catalog order)
+    by genre, tag, year and studio. Catalog order is oldest first by
+    (created_at, anime_id), which is also the keyset for cursor pagination.
+    """
+
+    def __init__(self, version: Tuple, anime_docs: List[dict], episode_docs: List[dict], anime_model, episode_model):
+        self.version = version
+        self.loaded_at = time.time()
+
+        self.anime: List[Dict[str, Any]] = sorted(_lean(anime_model, anime_docs), key=sort_key)
+        self.sort_keys: List[Tuple[float, str]] = [sort_key(a) for a in self.anime]
+        self.anime_by_id: Dict[str, Dict[str, Any]] = {a["anime_id"]: a for a in self.anime}
+        self.anime_payload: Dict[str, JSONPayload] = {a["anime_id"]: JSONPayload(dump_json(a)) for a in self.anime}
+        self.position: Dict[str, int] = {a["anime_id"]: i for i, a in enumerate(self.anime)}
+
+        self.by_genre: Dict[str, List[int]] = {}
+        self.by_tag: Dict[str, List[int]] = {}
+        self.by_year: Dict[int, List[int]] = {}
+        self.by_studio: Dict[str, List[int]] = {}
+        for i, a in enumerate(self.anime):
+            for genre in a["genres"]:
+                self.by_genre.setdefault(genre, []).append(i)
+            for tag in a["tags"]:
+                self.by_tag.setdefault(tag, []).append(i)
+            self.by_year.setdefault(a["year"], []).append(i)
+            self.by_studio.setdefault(a["studio"], []).append(i)
+
+        self.episodes_by_anime: Dict[str, List[Dict[str, Any]]] = {}
+        self.episode_by_id: Dict[str, Dict[str, Any]] = {}
+        for episode in _lean(episode_model, episode_docs):
+            self.episodes_by_anime.setdefault(episode["anime_id"], []).append(episode)
+            self.episode_by_id[episode["episode_id"]] = episode
+        for episodes in self.episodes_by_anime.values():
+            episodes.sort(key=lambda e: e["episode_number"])
+        # One per title, so compressed lazily on first request rather than all at build time
+        self.episodes_payload: Dict[str, JSONPayload] = {
+            anime_id: JSONPayload(json_array(dump_json(e) for e in episodes))
+            for anime_id, episodes in self.episodes_by_anime.items()
+        }
+
+        # Trending fallback until watch activity has been ranked: first titles in catalog order.
+        # These two are hot and bounded, so they are worth precompressing at the highest ratio.
+        self.trending_payload = JSONPayload(self.anime_list_json(range(min(10, len(self.anime))))).precompress()
+        newest = range(len(self.anime) - 1, max(len(self.anime) - 11, -1), -1)
+        self.new_releases_payload = JSONPayload(self.anime_list_json(newest)).precompress()
+
+    def anime_list_json(self, positions) -> bytes:
+        return json_array(self.anime_payload[self.anime[i]["anime_id"]].body for i in positions)
+
+    def filter_positions(self, genre: Optional[str] = None, tag: Optional[str] = None, year: Optional[int] = None, studio: Optional[str] = None) -> Sequence[int]:
+        """Catalog positions matching every given filter, in catalog order"""
+        postings = []
+        for index, key in ((self.by_genre, genre), (self.by_tag, tag), (self.by_year, year), (self.by_studio, studio)):
+            if key is not None:
+                postings.append(index.get(key, []))
+        if not postings:
+            return range(len(self.anime))
+        postings.sort(key=len)
+        result = postings[0]
+        for other in postings[1:]:
+            other_set = set(other)
+            result = [p for p in result if p in other_set]
+        return result
+
+    def index_after(self, positions: Sequence[int], cursor_values: List[Any]) -> int:
+        """Index into sorted `positions` of the first title after a cursor's (created_at, anime_id) key"""
+        created_at, anime_id = cursor_values
+        if not isinstance(created_at, (int, float)) or not isinstance(anime_id, str):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        position = bisect_right(self.sort_keys, (created_at, anime_id))
+        return bisect_right(positions, position - 1)
+
+    def changes_since(self, previous: "CatalogSnapshot") -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Anime added or modified since `previous`, and ids that disappeared"""
+        changed = [a for a in self.anime if previous.anime_by_id.get(a["anime_id"]) != a]
+        removed = [anime_id for anime_id in previous.anime_by_id if anime_id not in self.anime_by_id]
+        return changed, removed
+
+    def episodes_for(self, anime_id: str) -> JSONPayload:
+        return self.episodes_payload.get(anime_id, EMPTY_LIST_PAYLOAD)
+
+
+class CatalogStore:
+    """Holds the current CatalogSnapshot and swaps in a fresh one when the catalog changes
+
+    Changes are detected by polling the catalog_meta version counter, which
+    writers bump through bump_catalog_version, plus the collection sizes so
+    that edits made outside the API are picked up as well.
+
+    Derived indexes (search, suggestions, ...) register through `indexes`; each
+    provides rebuild(anime_docs) and update(changed_docs, removed_ids). Rebuilds
+    run in a worker thread; so do updates of indexes that set `update_in_thread`,
+    the others are updated on the event loop.
+    `on_snapshot` coroutines get each new snapshot before it becomes visible,
+    to prepare payloads derived from it.
+    """
+
+    def __init__(self, db, anime_model, episode_model, refresh_interval: float = 30.0, indexes=(), on_snapshot=()):
+        self.db = db
+        self.anime_model = anime_model
+        self.episode_model = episode_model
+        self.refresh_interval = refresh_interval
+        self.indexes = list(indexes)
+        self.on_snapshot = list(on_snapshot)
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.refreshes = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def require(self) -> CatalogSnapshot:
+        snapshot = self.snapshot
+        if snapshot is None:
+            raise HTTPException(status_code=503, detail="Catalog not loaded")
+        return snapshot
+
+    async def current_version(self) -> Tuple:
+        meta, anime_count, episode_count = await asyncio.gather(
+            self.db.catalog_meta.find_one({"_id": CATALOG_META_ID}),
+            self.db.anime.estimated_document_count(),
+            self.db.episodes.estimated_document_count()
+        )
+        return ((meta or {}).get("version", 0), anime_count, episode_count)
+
+    async def load(self) -> CatalogSnapshot:
+        version = await self.current_version()
+        anime_docs, episode_docs = await asyncio.gather(
+            self.db.anime.find({}, {"_id": 0}).to_list(None),
+            self.db.episodes.find({}, {"_id": 0}).to_list(None)
+        )
+        snapshot = await asyncio.to_thread(
+            CatalogSnapshot, version, anime_docs, episode_docs, self.anime_model, self.episode_model
+        )
+        await self._sync_indexes(self.snapshot, snapshot)
+        for hook in self.on_snapshot:
+            await hook(snapshot)
+        # Single reference swap: requests see either the old or the new snapshot, never a mix
+        self.snapshot = snapshot
+        self.refreshes += 1
+        logger.info(f"Loaded catalog snapshot {version}: {len(snapshot.anime)} anime, {len(snapshot.episode_by_id)} episodes")
+        return snapshot
+
+    async def _sync_indexes(self, previous: Optional[CatalogSnapshot], snapshot: CatalogSnapshot) -> None:
+        if not self.indexes:
+            return
+        if previous is not None:
+            changed, removed = snapshot.changes_since(previous)
+            if len(changed) + len(removed) <= INCREMENTAL_UPDATE_LIMIT:
+                for index in self.indexes:
+                    if getattr(index, "update_in_thread", False):
+                        await asyncio.to_thread(index.update, changed, removed)
+                    else:
+                        index.update(changed, removed)
+                return
+        for index in self.indexes:
+            await asyncio.to_thread(index.rebuild, snapshot.anime)
+
+    async def refresh_if_changed(self) -> bool:
+        version = await self.current_version()
+        if self.snapshot is not None and version == self.snapshot.version:
+            return False
+        await self.load()
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            "loaded": snapshot is not None,
+            "version": list(snapshot.version) if snapshot else None,
+            "age_seconds": round(time.time() - snapshot.loaded_at, 3) if snapshot else None,
+            "anime": len(snapshot.anime) if snapshot else 0,
+            "episodes": len(snapshot.episode_by_id) if snapshot else 0,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "refresh_interval": self.refresh_interval,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh_if_changed()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Catalog refresh failed: {e}")
@@ -0,0 +1,117 @@
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# Implicit signals from watch history, explicit ones from ratings; the strongest per pair wins
+WATCH_STARTED_WEIGHT = 0.5
+WATCH_COMPLETED_WEIGHT = 1.0
+LIKED_WEIGHT = 1.0
+# Explicit dislikes (liked=False or a score at or below this) drop the pair entirely
+DISLIKE_MAX_SCORE = 4
+
+SIMILAR_TOP_K = 20
+# Neighbours need this many profiles in common; shrinkage damps similarities built on few of them
+MIN_SUPPORT = 2
+SHRINKAGE = 10.0
+# Items per sparse product; bounds the similarity block to CHUNK x items entries
+CHUNK_ITEMS = 1024
+
+
+def watch_weight(doc: dict) -> float:
+    return WATCH_COMPLETED_WEIGHT if doc.get("completed") else WATCH_STARTED_WEIGHT
+
+
+def rating_weight(doc: dict) -> Optional[float]:
+    """Preference weight of a rating row, 0 for an explicit dislike, None when it carries no signal"""
+    score = doc.get("score")
+    if doc.get("liked") is False or (score is not None and score <= DISLIKE_MAX_SCORE):
+        return 0.0
+    if score is not None:
+        return score / 10
+    if doc.get("liked"):
+        return LIKED_WEIGHT
+    return None
+
+
+class InteractionMatrix:
+    """Accumulates (profile, anime, weight) signals row by row and emits a profile x anime CSR matrix"""
+
+    def __init__(self):
+        self.profiles: Dict[str, int] = {}
+        self.items: Dict[str, int] = {}
+        self.weights: Dict[Tuple[int, int], float] = {}
+        self.disliked: Set[Tuple[int, int]] = set()
+
+    def add(self, profile_id: str, anime_id: str, weight: Optional[float]) -> None:
+        if weight is None or not profile_id or not anime_id:
+            return
+        key = (
+            self.profiles.setdefault(profile_id, len(self.profiles)),
+            self.items.setdefault(anime_id, len(self.items)),
+        )
+        if weight <= 0:
+            self.disliked.add(key)
+        elif weight > self.weights.get(key, 0.0):
+            self.weights[key] = weight
+
+    def to_csr(self) -> sparse.csr_matrix:
+        # An explicit dislike drops the pair however much of it was watched
+        pairs = [(key, weight) for key, weight in self.weights.items() if key not in self.disliked]
+        rows = np.fromiter((key[0] for key, _ in pairs), dtype=np.int32, count=len(pairs))
+        cols = np.fromiter((key[1] for key, _ in pairs), dtype=np.int32, count=len(pairs))
+        values = np.fromiter((weight for _, weight in pairs), dtype=np.float32, count=len(pairs))
+        return sparse.csr_matrix((values, (rows, cols)), shape=(len(self.profiles), len(self.items)))
+
+    def anime_ids(self) -> List[str]:
+        ids = [""] * len(self.items)
+        for anime_id, index in self.items.items():
+            ids[index] = anime_id
+        return ids
+
+
+def item_neighbours(
+    matrix: sparse.csr_matrix,
+    top_k: int = SIMILAR_TOP_K,
+    min_support: int = MIN_SUPPORT,
+    shrinkage: float = SHRINKAGE,
+    chunk: int = CHUNK_ITEMS,
+) -> Iterator[Tuple[int, List[Tuple[int, float, int]]]]:
+    """Yield (item, [(neighbour, score, support), ...]) using shrunk cosine similarity between item columns
+
+    Similarities are computed `chunk` items at a time as sparse products, so peak
+    memory is bounded by the chunk rather than the full item x item matrix.
+    """
+    matrix = sparse.csc_matrix(matrix, dtype=np.float32)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    normalized = (matrix @ sparse.diags(1.0 / norms)).tocsc()
+    binary = normalized.copy()
+    binary.data[:] = 1.0
+    normalized_t = normalized.T.tocsr()
+    binary_t = binary.T.tocsr()
+
+    n_items = matrix.shape[1]
+    for start in range(0, n_items, chunk):
+        stop = min(start + chunk, n_items)
+        # Both products share one sparsity pattern: every stored weight is positive
+        similarity = (normalized_t[start:stop] @ normalized).tocsr()
+        support = (binary_t[start:stop] @ binary).tocsr()
+        similarity.sort_indices()
+        support.sort_indices()
+        for offset in range(stop - start):
+            item = start + offset
+            lo, hi = similarity.indptr[offset], similarity.indptr[offset + 1]
+            cols = similarity.indices[lo:hi]
+            counts = support.data[support.indptr[offset]:support.indptr[offset + 1]]
+            keep = (cols != item) & (counts >= min_support)
+            if not keep.any():
+                continue
+            cols, counts = cols[keep], counts[keep]
+            scores = similarity.data[lo:hi][keep] * counts / (counts + shrinkage)
+            if len(scores) > top_k:
+                top = np.argpartition(-scores, top_k - 1)[:top_k]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            yield item, [(int(cols[i]), float(scores[i]), int(counts[i])) for i in top]
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
+
+from indexes import ensure_indexes
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# Collections that must hold at most one row per (profile_id, anime_id),
+# with the field used to decide which duplicate is the freshest
+DEDUPE_TARGETS = [
+    ("watch_history", "last_watched_at"),
+    ("my_list", "added_at"),
+    ("ratings", "created_at"),
+]
+
+# Non-unique index that predates the unique one and blocks its creation
+LEGACY_INDEX = "profile_id_anime_id"
+
+
+async def dedupe_collection(db, collection, recency_field, dry_run):
+    """Keep the most recent row per (profile_id, anime_id) and delete the rest"""
+    groups = db[collection].aggregate([
+        {"$sort": {recency_field: -1, "_id": -1}},
+        {"$group": {
+            "_id": {"profile_id": "$profile_id", "anime_id": "$anime_id"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+
+    duplicate_groups = 0
+    removed = 0
+    async for group in groups:
+        duplicate_groups += 1
+        stale_ids = group["ids"][1:]
+        if not dry_run:
+            result = await db[collection].delete_many({"_id": {"$in": stale_ids}})
+            removed += result.deleted_count
+        else:
+            removed += len(stale_ids)
+    return duplicate_groups, removed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Remove duplicate per-profile rows before enforcing unique indexes")
+    parser.add_argument("--dry-run", action="store_true", help="report duplicates without deleting them")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    for collection, recency_field in DEDUPE_TARGETS:
+        groups, removed = await dedupe_collection(db, collection, recency_field, args.dry_run)
+        verb = "would remove" if args.dry_run else "removed"
+        print(f"✓ {collection}: {groups} duplicated keys, {verb} {removed} rows")
+
+        if not args.dry_run:
+            try:
+                await db[collection].drop_index(LEGACY_INDEX)
+                print(f"  dropped legacy index {LEGACY_INDEX}")
+            except OperationFailure:
+                pass
+
+    if not args.dry_run:
+        failed = await ensure_indexes(db)
+        if failed:
+            print(f"\n❌ Deduplication completed, but these indexes still could not be built: {', '.join(failed)}")
+        else:
+            print("\n✅ Deduplication completed and unique indexes ensured.")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
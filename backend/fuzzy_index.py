@@ -0,0 +1,200 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from search_index import tokenize
+
+# Edit budget grows with token length so short words don't match half the vocabulary
+FUZZY_MAX_DISTANCE = 2
+FUZZY_MIN_TOKEN_LENGTH = 3
+# Deletes are generated from this many leading characters only (SymSpell prefix trick),
+# which bounds index size and lookup work regardless of how long titles get
+FUZZY_PREFIX_LENGTH = 7
+FUZZY_MAX_CANDIDATES = 5
+# Hard cap on distance checks per token, so dense vocabularies can't make one lookup slow
+FUZZY_MAX_VERIFICATIONS = 300
+
+
+def max_distance(token: str) -> int:
+    if len(token) < FUZZY_MIN_TOKEN_LENGTH:
+        return 0
+    if len(token) <= 5:
+        return 1
+    return FUZZY_MAX_DISTANCE
+
+
+def delete_levels(word: str, distance: int) -> List[Set[str]]:
+    """Strings reachable from `word` by removing exactly 0, 1, ... `distance` characters"""
+    levels = [{word}]
+    seen = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in levels[-1] for i in range(len(w))} - seen
+        seen |= frontier
+        levels.append(frontier)
+    return levels
+
+
+def deletes(word: str, distance: int) -> Set[str]:
+    """All strings reachable from `word` by removing up to `distance` characters, including `word`"""
+    return set().union(*delete_levels(word, distance))
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent swaps), or limit + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def title_terms(doc: dict) -> Tuple[Set[str], Dict[str, Tuple[str, str]]]:
+    """Title tokens, plus adjacent pairs written together so 'chainsawman' resolves to ('chainsaw', 'man')"""
+    terms: Set[str] = set()
+    compounds: Dict[str, Tuple[str, str]] = {}
+    for title in [doc.get("title", "")] + list(doc.get("alt_titles") or []):
+        tokens = tokenize(title)
+        terms.update(token for token in tokens if len(token) >= FUZZY_MIN_TOKEN_LENGTH)
+        for first, second in zip(tokens, tokens[1:]):
+            compounds.setdefault(first + second, (first, second))
+    return terms, compounds
+
+
+class _FuzzyState:
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.deletes: Dict[str, Set[str]] = {}
+        # Run-together pairs only match exactly; fuzzing them too would flood the delete buckets
+        self.compounds: Dict[str, Tuple[str, str]] = {}
+        self.compound_counts: Dict[str, int] = {}
+        self.terms_by_anime: Dict[str, Tuple[Set[str], Dict[str, Tuple[str, str]]]] = {}
+
+    def add(self, doc: dict) -> None:
+        anime_id = doc["anime_id"]
+        if anime_id in self.terms_by_anime:
+            self.remove(anime_id)
+        terms, compounds = self.terms_by_anime[anime_id] = title_terms(doc)
+        for term in terms:
+            count = self.counts.get(term, 0)
+            self.counts[term] = count + 1
+            if not count:
+                for key in deletes(term[:FUZZY_PREFIX_LENGTH], max_distance(term)):
+                    self.deletes.setdefault(key, set()).add(term)
+        for compound, parts in compounds.items():
+            self.compound_counts[compound] = self.compound_counts.get(compound, 0) + 1
+            self.compounds[compound] = parts
+
+    def remove(self, anime_id: str) -> None:
+        terms, compounds = self.terms_by_anime.pop(anime_id, (set(), {}))
+        for term in terms:
+            count = self.counts[term] - 1
+            if count:
+                self.counts[term] = count
+                continue
+            del self.counts[term]
+            for key in deletes(term[:FUZZY_PREFIX_LENGTH], max_distance(term)):
+                bucket = self.deletes[key]
+                bucket.discard(term)
+                if not bucket:
+                    del self.deletes[key]
+        for compound in compounds:
+            count = self.compound_counts[compound] - 1
+            if count:
+                self.compound_counts[compound] = count
+            else:
+                del self.compound_counts[compound]
+                del self.compounds[compound]
+
+
+class FuzzyIndex:
+    """SymSpell-style deletion index over title tokens for typo-tolerant search
+
+    A lookup touches only the deletes of the query token, so its cost depends
+    on the token and the edit budget, not on catalog size.
+    """
+
+    def __init__(self):
+        self._state = _FuzzyState()
+
+    def __len__(self) -> int:
+        return len(self._state.counts)
+
+    def rebuild(self, docs: Iterable[dict]) -> None:
+        state = _FuzzyState()
+        for doc in docs:
+            state.add(doc)
+        self._state = state
+
+    def update(self, changed: Iterable[dict], removed: Iterable[str]) -> None:
+        state = self._state
+        for anime_id in removed:
+            state.remove(anime_id)
+        for doc in changed:
+            state.add(doc)
+
+    def lookup(self, token: str, limit: int = FUZZY_MAX_CANDIDATES) -> List[Tuple[str, int]]:
+        """Title terms at the smallest edit distance found within budget, most common first"""
+        state = self._state
+        budget = max_distance(token)
+        if not budget:
+            return []
+        found: Dict[str, int] = {}
+        checked: Set[str] = set()
+        for level, keys in enumerate(delete_levels(token[:FUZZY_PREFIX_LENGTH], budget)):
+            # Every term within distance d shares a key at query-delete level <= d, so once
+            # something is found at or below this level no deeper key can beat it
+            if found and min(found.values()) < level:
+                break
+            for key in keys:
+                for term in state.deletes.get(key, ()):
+                    if term in checked or len(checked) >= FUZZY_MAX_VERIFICATIONS:
+                        continue
+                    checked.add(term)
+                    term_budget = min(budget, max_distance(term))
+                    distance = edit_distance(token, term, term_budget)
+                    if distance <= term_budget:
+                        found[term] = distance
+        if found:
+            closest = min(found.values())
+            found = {term: distance for term, distance in found.items() if distance == closest}
+        ranked = sorted(found.items(), key=lambda item: (item[1], -state.counts[item[0]], item[0]))
+        return ranked[:limit]
+
+    def split_compound(self, token: str) -> Optional[Tuple[str, str]]:
+        return self._state.compounds.get(token)
+
+    def correct(self, tokens: List[str], known: Callable[[str], bool]) -> Optional[List[Dict[str, float]]]:
+        """Term groups for `SearchIndex.search_term_groups` with typos replaced by close title terms
+
+        Returns None when nothing could be corrected, so callers can skip the extra search.
+        """
+        groups: List[Dict[str, float]] = []
+        corrected = False
+        for token in tokens:
+            is_known = known(token)
+            parts = None if is_known else self.split_compound(token)
+            if parts is not None:
+                groups.extend({part: 1.0} for part in parts)
+                corrected = True
+                continue
+            group = {token: 1.0} if is_known else {}
+            for term, distance in self.lookup(token):
+                if term != token:
+                    group.setdefault(term, 1.0 / (1 + distance))
+                    corrected = True
+            if not group:
+                return None
+            groups.append(group)
+        return groups if corrected else None
+
+    def stats(self) -> Dict[str, int]:
+        state = self._state
+        return {"terms": len(state.counts), "compounds": len(state.compounds), "deletes": len(state.deletes)}
@@ -0,0 +1,209 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Every index the API routes rely on, per collection
+INDEXES = {
+    "users": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "user_sessions": [
+        IndexModel([("session_token", ASCENDING)], name="session_token_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # Mongo's TTL monitor deletes sessions once expires_at (a BSON date) has passed
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "revoked_sessions": [
+        IndexModel([("jti", ASCENDING)], name="jti_unique", unique=True),
+        # Revocations only matter until the token would have expired anyway
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "profiles": [
+        IndexModel([("profile_id", ASCENDING)], name="profile_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "anime": [
+        IndexModel([("anime_id", ASCENDING)], name="anime_id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+        IndexModel([("genres", ASCENDING)], name="genres"),
+        IndexModel([("tags", ASCENDING)], name="tags"),
+    ],
+    "episodes": [
+        IndexModel([("episode_id", ASCENDING)], name="episode_id_unique", unique=True),
+        IndexModel([("anime_id", ASCENDING), ("episode_number", ASCENDING)], name="anime_id_episode_number"),
+    ],
+    "watch_history": [
+        IndexModel(
+            [("profile_id", ASCENDING), ("completed", ASCENDING), ("last_watched_at", DESCENDING)],
+            name="profile_id_completed_last_watched_at"
+        ),
+        IndexModel([("profile_id", ASCENDING), ("anime_id", ASCENDING)], name="profile_id_anime_id_unique", unique=True),
+    ],
+    "episode_progress": [
+        IndexModel(
+            [("profile_id", ASCENDING), ("anime_id", ASCENDING), ("episode_id", ASCENDING)],
+            name="profile_id_anime_id_episode_id_unique",
+            unique=True
+        ),
+    ],
+    "my_list": [
+        IndexModel(
+            [("profile_id", ASCENDING), ("added_at", DESCENDING), ("list_id", DESCENDING)],
+            name="profile_id_added_at_list_id"
+        ),
+        IndexModel([("profile_id", ASCENDING), ("anime_id", ASCENDING)], name="profile_id_anime_id_unique", unique=True),
+    ],
+    "ratings": [
+        IndexModel([("profile_id", ASCENDING), ("anime_id", ASCENDING)], name="profile_id_anime_id_unique", unique=True),
+    ],
+    "reviews": [
+        IndexModel(
+            [("anime_id", ASCENDING), ("created_at", DESCENDING), ("review_id", DESCENDING)],
+            name="anime_id_created_at_review_id"
+        ),
+    ],
+    "anime_stats": [
+        IndexModel([("anime_id", ASCENDING)], name="anime_id_unique", unique=True),
+    ],
+    "trending_scores": [
+        IndexModel([("anime_id", ASCENDING)], name="anime_id_unique", unique=True),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "similar_items": [
+        IndexModel([("anime_id", ASCENDING)], name="anime_id_unique", unique=True),
+        IndexModel([("computed_at", ASCENDING)], name="computed_at"),
+    ],
+}
+
+# Canonical query shape of each route, used by the explain audit
+ROUTE_QUERIES = [
+    {"route": "get_current_user", "collection": "user_sessions", "filter": {"session_token": "session_audit"}},
+    {"route": "get_current_user", "collection": "users", "filter": {"user_id": "user_audit"}},
+    {"route": "POST /auth/login", "collection": "users", "filter": {"email": "audit@example.com"}},
+    {"route": "GET /profiles", "collection": "profiles", "filter": {"user_id": "user_audit"}},
+    {"route": "profile ownership check", "collection": "profiles", "filter": {"profile_id": "profile_audit", "user_id": "user_audit"}},
+    {"route": "GET /anime?genre=", "collection": "anime", "filter": {"genres": "Action"}},
+    {"route": "GET /anime/new-releases", "collection": "anime", "filter": {}, "sort": [("created_at", DESCENDING)]},
+    {"route": "GET /anime/{anime_id}", "collection": "anime", "filter": {"anime_id": "anime_audit"}},
+    {"route": "GET /anime/{anime_id}/recommendations", "collection": "similar_items", "filter": {"anime_id": "anime_audit"}},
+    {"route": "GET /anime/{anime_id}/episodes", "collection": "episodes", "filter": {"anime_id": "anime_audit"}, "sort": [("episode_number", ASCENDING)]},
+    {"route": "POST /watch-history", "collection": "watch_history", "filter": {"profile_id": "profile_audit", "anime_id": "anime_audit"}},
+    {
+        "route": "GET /watch-history/{profile_id}/continue-watching",
+        "collection": "watch_history",
+        "filter": {"profile_id": "profile_audit", "completed": False},
+        "sort": [("last_watched_at", DESCENDING)],
+    },
+    {"route": "GET /episodes/{episode_id}/context", "collection": "episodes", "filter": {"episode_id": "episode_audit"}},
+    {
+        "route": "GET /watch-history/{profile_id}/anime/{anime_id}/progress",
+        "collection": "episode_progress",
+        "filter": {"profile_id": "profile_audit", "anime_id": "anime_audit"},
+    },
+    {"route": "POST /my-list", "collection": "my_list", "filter": {"profile_id": "profile_audit", "anime_id": "anime_audit"}},
+    {"route": "GET /my-list/{profile_id}", "collection": "my_list", "filter": {"profile_id": "profile_audit"}, "sort": [("added_at", DESCENDING), ("list_id", DESCENDING)]},
+    {"route": "GET /ratings/{anime_id}/{profile_id}", "collection": "ratings", "filter": {"profile_id": "profile_audit", "anime_id": "anime_audit"}},
+    {"route": "GET /anime/{anime_id}", "collection": "anime_stats", "filter": {"anime_id": "anime_audit"}},
+    {"route": "GET /reviews/{anime_id}", "collection": "reviews", "filter": {"anime_id": "anime_audit"}, "sort": [("created_at", DESCENDING), ("review_id", DESCENDING)]},
+]
+
+
+async def ensure_indexes(db):
+    """Create any missing indexes declared in INDEXES; returns "collection.index" names that failed
+
+    Indexes are created one at a time, so one blocked by existing data doesn't
+    keep the rest of its collection's indexes from being built.
+    """
+    failed = []
+    for collection, models in INDEXES.items():
+        created = []
+        for model in models:
+            name = model.document["name"]
+            try:
+                created += await db[collection].create_indexes([model])
+            except OperationFailure as e:
+                # Usually duplicate data blocking a unique index; keep serving and report it
+                logger.error(f"Failed to ensure index {name} on {collection}: {e}")
+                failed.append(f"{collection}.{name}")
+        if created:
+            logger.info(f"Ensured indexes on {collection}: {', '.join(created)}")
+    return failed
+
+
+def _find_stages(plan):
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_find_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_find_stages(item))
+    return stages
+
+
+async def audit_indexes(db):
+    """Run explain on every canonical route query and return (route, collection, stages) rows"""
+    report = []
+    for query in ROUTE_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"])
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        explain = await cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        report.append((query["route"], query["collection"], _find_stages(winning_plan)))
+    return report
+
+
+def print_audit(report):
+    """Print one line per audited route; exit status 1 if any of them scans a whole collection"""
+    failures = 0
+    for route, collection, stages in report:
+        collscan = "COLLSCAN" in stages
+        failures += collscan
+        marker = "❌" if collscan else "✅"
+        print(f"{marker} {route} [{collection}]: {' -> '.join(stages) or 'EOF'}")
+
+    if failures:
+        print(f"\n{failures} route queries fall back to a collection scan")
+        return 1
+    print("\nAll route queries are index-backed")
+    return 0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Ensure and audit MongoDB indexes used by the API")
+    parser.add_argument("--audit", action="store_true", help="explain each route query and fail on COLLSCAN")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        failed = await ensure_indexes(db)
+        for name in failed:
+            print(f"❌ could not build index {name}")
+        if not args.audit:
+            return 1 if failed else 0
+
+        return print_audit(await audit_indexes(db)) or (1 if failed else 0)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(asyncio.run(main()))
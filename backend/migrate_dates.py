@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from indexes import ensure_indexes
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# Fields the API used to write as ISO-8601 strings, per collection
+DATE_FIELDS = {
+    "users": ["created_at"],
+    "user_sessions": ["expires_at", "created_at"],
+    "profiles": ["created_at"],
+    "anime": ["created_at"],
+    "episodes": ["created_at"],
+    "watch_history": ["last_watched_at"],
+    "episode_progress": ["last_watched_at"],
+    "my_list": ["added_at"],
+    "ratings": ["created_at"],
+    "reviews": ["created_at"],
+}
+
+BATCH_SIZE = 1000
+
+
+def parse_date(value: str):
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+async def migrate_collection(db, collection, fields, batch_size, dry_run):
+    """Rewrite string date fields as BSON dates, one bulk write per batch; returns (converted, unparseable)"""
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    converted = 0
+    unparseable = 0
+    batch = []
+    async for doc in db[collection].find(query, projection).sort("_id", 1).batch_size(batch_size):
+        updates = {}
+        for field in fields:
+            value = doc.get(field)
+            if not isinstance(value, str):
+                continue
+            try:
+                updates[field] = parse_date(value)
+            except ValueError:
+                unparseable += 1
+        if not updates:
+            continue
+        converted += 1
+        # Matching on the old value leaves rows alone that a live server rewrote meanwhile
+        batch.append(UpdateOne({"_id": doc["_id"], **{f: doc[f] for f in updates}}, {"$set": updates}))
+        if len(batch) >= batch_size:
+            if not dry_run:
+                await db[collection].bulk_write(batch, ordered=False)
+            batch = []
+    if batch and not dry_run:
+        await db[collection].bulk_write(batch, ordered=False)
+    return converted, unparseable
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Convert ISO-8601 string dates to native BSON dates")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="count rows to convert without writing")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    for collection, fields in DATE_FIELDS.items():
+        converted, unparseable = await migrate_collection(db, collection, fields, args.batch_size, args.dry_run)
+        verb = "would convert" if args.dry_run else "converted"
+        print(f"✓ {collection}: {verb} {converted} rows" + (f", {unparseable} unparseable values left as-is" if unparseable else ""))
+
+    if not args.dry_run:
+        # The TTL index on user_sessions.expires_at only expires BSON dates, so create it after converting
+        await ensure_indexes(db)
+        print("\n✅ Date migration completed; expired sessions are now purged by the TTL index.")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
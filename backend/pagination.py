@@ -0,0 +1,49 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import HTTPException
+
+
+# Datetimes round-trip through cursors as {"$date": isoformat} so keyset filters compare BSON dates
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if set(value) != {"$date"} or not isinstance(value["$date"], str):
+            raise ValueError("unexpected cursor value")
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(*sort_key: Any) -> str:
+    """Encode the sort key of the last returned row as an opaque cursor token"""
+    raw = json.dumps([_encode_value(v) for v in sort_key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor token produced by encode_cursor, rejecting anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("unexpected cursor shape")
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(field: str, tie_breaker: str, cursor_values: List[Any], descending: bool = True) -> dict:
+    """Mongo filter selecting rows strictly after the cursor in (field, tie_breaker) order"""
+    op = "$lt" if descending else "$gt"
+    value, tie = cursor_values
+    return {"$or": [
+        {field: {op: value}},
+        {field: value, tie_breaker: {op: tie}}
+    ]}
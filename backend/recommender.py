@@ -0,0 +1,263 @@
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from search_index import tokenize
+
+RECOMMEND_TOP_K = 20
+# Rows scored per matrix product; bounds the temporary similarity block to CHUNK x titles floats
+RECOMMEND_CHUNK_ROWS = 512
+# Vocabulary caps: most common values seen in at least 2 titles (synopsis terms: at most half of them)
+RECOMMEND_MAX_TAGS = 500
+RECOMMEND_SYNOPSIS_TERMS = 1000
+YEAR_BUCKET_SIZE = 5
+
+# Relative weight of each feature block after per-block normalization
+BLOCK_WEIGHTS = {
+    "genres": 1.0,
+    "tags": 0.8,
+    "synopsis": 0.8,
+    "studio": 0.4,
+    "year": 0.3,
+}
+
+
+def _unit(values: Dict[int, float], weight: float) -> Dict[int, float]:
+    norm = math.sqrt(sum(v * v for v in values.values()))
+    if not norm:
+        return {}
+    return {col: weight * v / norm for col, v in values.items()}
+
+
+class _Vectorizer:
+    """Column layout and IDF weights, fixed at rebuild time"""
+
+    def __init__(self, docs: List[dict]):
+        self.columns: Dict[Tuple[str, str], int] = {}
+        tag_counts = Counter()
+        for doc in docs:
+            for genre in doc.get("genres", []):
+                self._column("genres", genre)
+            tag_counts.update(set(doc.get("tags", [])))
+            if doc.get("studio"):
+                self._column("studio", doc["studio"])
+            if doc.get("year"):
+                self._column("year", str(doc["year"] // YEAR_BUCKET_SIZE))
+        for tag, count in tag_counts.most_common(RECOMMEND_MAX_TAGS):
+            if count >= 2:
+                self._column("tags", tag)
+
+        df = Counter()
+        for doc in docs:
+            df.update(set(tokenize(doc.get("synopsis", ""))))
+        n = max(len(docs), 1)
+        eligible = [(count, term) for term, count in df.items() if 2 <= count <= n / 2 and len(term) > 2]
+        self.idf: Dict[int, float] = {}
+        for count, term in sorted(eligible, reverse=True)[:RECOMMEND_SYNOPSIS_TERMS]:
+            self.idf[self._column("synopsis", term)] = math.log((1 + n) / (1 + count)) + 1
+
+    def _column(self, block: str, value: str) -> int:
+        return self.columns.setdefault((block, value), len(self.columns))
+
+    @property
+    def dimensions(self) -> int:
+        return len(self.columns)
+
+    def features(self, doc: dict) -> Dict[int, float]:
+        """Sparse feature row; values the layout doesn't know (new tags etc.) wait for the next rebuild"""
+        columns = self.columns
+        blocks = {
+            "genres": {columns[("genres", g)]: 1.0 for g in doc.get("genres", []) if ("genres", g) in columns},
+            "tags": {columns[("tags", t)]: 1.0 for t in doc.get("tags", []) if ("tags", t) in columns},
+            "studio": {columns[("studio", doc["studio"])]: 1.0} if ("studio", doc.get("studio")) in columns else {},
+            "year": {},
+            "synopsis": {},
+        }
+        if doc.get("year"):
+            year_col = columns.get(("year", str(doc["year"] // YEAR_BUCKET_SIZE)))
+            if year_col is not None:
+                blocks["year"] = {year_col: 1.0}
+        for term, count in Counter(tokenize(doc.get("synopsis", ""))).items():
+            col = columns.get(("synopsis", term))
+            if col is not None:
+                blocks["synopsis"][col] = (1 + math.log(count)) * self.idf[col]
+
+        row: Dict[int, float] = {}
+        for block, values in blocks.items():
+            row.update(_unit(values, BLOCK_WEIGHTS[block]))
+        return _unit(row, 1.0)
+
+
+class _RecommenderState:
+    def __init__(self, vectorizer: _Vectorizer, capacity: int):
+        self.vectorizer = vectorizer
+        capacity = max(capacity, 16)
+        self.matrix = np.zeros((capacity, max(vectorizer.dimensions, 1)), dtype=np.float32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.neighbour_rows = np.full((capacity, RECOMMEND_TOP_K), -1, dtype=np.int32)
+        self.neighbour_scores = np.full((capacity, RECOMMEND_TOP_K), -np.inf, dtype=np.float32)
+        self.row_by_id: Dict[str, int] = {}
+        self.id_by_row: Dict[int, str] = {}
+        self.free_rows: List[int] = []
+        self.size = 0
+
+    def copy(self) -> "_RecommenderState":
+        """Independent copy to apply an update to while readers keep using this one"""
+        state = _RecommenderState.__new__(_RecommenderState)
+        state.vectorizer = self.vectorizer
+        state.matrix = self.matrix.copy()
+        state.alive = self.alive.copy()
+        state.neighbour_rows = self.neighbour_rows.copy()
+        state.neighbour_scores = self.neighbour_scores.copy()
+        state.row_by_id = dict(self.row_by_id)
+        state.id_by_row = dict(self.id_by_row)
+        state.free_rows = list(self.free_rows)
+        state.size = self.size
+        return state
+
+    def _grow(self) -> None:
+        capacity = len(self.alive) * 2
+        for name, fill in (("matrix", 0), ("alive", False), ("neighbour_rows", -1), ("neighbour_scores", -np.inf)):
+            current = getattr(self, name)
+            grown = np.full((capacity,) + current.shape[1:], fill, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+    def put(self, doc: dict) -> int:
+        anime_id = doc["anime_id"]
+        row = self.row_by_id.get(anime_id)
+        if row is None:
+            if self.free_rows:
+                row = self.free_rows.pop()
+            else:
+                if self.size == len(self.alive):
+                    self._grow()
+                row = self.size
+                self.size += 1
+            self.row_by_id[anime_id] = row
+            self.id_by_row[row] = anime_id
+        features = self.vectorizer.features(doc)
+        self.matrix[row] = 0
+        if features:
+            self.matrix[row, list(features)] = list(features.values())
+        self.alive[row] = True
+        return row
+
+    def drop(self, anime_id: str) -> Optional[int]:
+        row = self.row_by_id.pop(anime_id, None)
+        if row is None:
+            return None
+        del self.id_by_row[row]
+        self.matrix[row] = 0
+        self.alive[row] = False
+        self.neighbour_rows[row] = -1
+        self.neighbour_scores[row] = -np.inf
+        self.free_rows.append(row)
+        return row
+
+    def recompute(self, rows: np.ndarray) -> None:
+        """Top-k cosine neighbours for `rows`, one (chunk x titles) matrix product at a time"""
+        live = self.matrix[:self.size]
+        dead = ~self.alive[:self.size]
+        k = RECOMMEND_TOP_K
+        for start in range(0, len(rows), RECOMMEND_CHUNK_ROWS):
+            chunk = rows[start:start + RECOMMEND_CHUNK_ROWS]
+            scores = self.matrix[chunk] @ live.T
+            scores[:, dead] = -np.inf
+            scores[np.arange(len(chunk)), chunk] = -np.inf
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.tile(np.arange(scores.shape[1]), (len(chunk), 1))
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            width = top.shape[1]
+            self.neighbour_rows[chunk] = -1
+            self.neighbour_scores[chunk] = -np.inf
+            self.neighbour_rows[chunk, :width] = top
+            self.neighbour_scores[chunk, :width] = top_scores
+
+
+class ContentRecommender:
+    """Content-based "more like this": cosine similarity over genre, tag, studio, year and synopsis features
+
+    Neighbour lists for every title are computed in batched matrix products and
+    stored, so a lookup is an array read. Small catalog diffs only recompute the
+    rows whose top-k could have changed; the feature layout and IDF weights are
+    refreshed by the next full rebuild. Updates are applied to a copy and swapped
+    in, so both rebuild and update can run in a worker thread.
+    """
+
+    # Tells CatalogStore to run update() off the event loop
+    update_in_thread = True
+
+    def __init__(self):
+        self._state: Optional[_RecommenderState] = None
+
+    def __len__(self) -> int:
+        return len(self._state.row_by_id) if self._state else 0
+
+    def rebuild(self, docs: Iterable[dict]) -> None:
+        docs = list(docs)
+        state = _RecommenderState(_Vectorizer(docs), len(docs))
+        for doc in docs:
+            state.put(doc)
+        state.recompute(np.arange(state.size))
+        self._state = state
+
+    def update(self, changed: Iterable[dict], removed: Iterable[str]) -> None:
+        if self._state is None:
+            return
+        state = self._state.copy()
+        touched = [row for row in (state.drop(anime_id) for anime_id in removed) if row is not None]
+        changed_rows = [state.put(doc) for doc in changed]
+        touched += changed_rows
+        if not touched:
+            return
+
+        size = state.size
+        alive = state.alive[:size]
+        # Rows that pointed at a touched title may have lost a neighbour or seen its score drop
+        stale = np.isin(state.neighbour_rows[:size], touched).any(axis=1) & alive
+        if changed_rows:
+            stale[changed_rows] = True
+            # Elsewhere a changed title can only enter a top-k, so merge it instead of recomputing
+            changed = np.array(changed_rows)
+            similarity = state.matrix[:size] @ state.matrix[changed].T
+            similarity[changed, np.arange(len(changed))] = -np.inf
+            entering = np.flatnonzero((similarity > state.neighbour_scores[:size, -1:]).any(axis=1) & alive & ~stale)
+            if len(entering):
+                rows = np.hstack([state.neighbour_rows[entering], np.tile(changed, (len(entering), 1))])
+                scores = np.hstack([state.neighbour_scores[entering], similarity[entering]])
+                order = np.argsort(-scores, axis=1, kind="stable")[:, :RECOMMEND_TOP_K]
+                state.neighbour_rows[entering] = np.take_along_axis(rows, order, axis=1)
+                state.neighbour_scores[entering] = np.take_along_axis(scores, order, axis=1)
+        state.recompute(np.flatnonzero(stale))
+        self._state = state
+
+    def similar(self, anime_id: str, limit: int = 10) -> List[str]:
+        """Most similar titles first; titles sharing no features are left out"""
+        state = self._state
+        row = state.row_by_id.get(anime_id) if state else None
+        if row is None:
+            return []
+        result = []
+        for neighbour, score in zip(state.neighbour_rows[row], state.neighbour_scores[row]):
+            if len(result) >= limit or neighbour < 0 or score <= 0:
+                break
+            result.append(state.id_by_row[int(neighbour)])
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        state = self._state
+        if state is None:
+            return {"titles": 0, "dimensions": 0, "matrix_bytes": 0}
+        return {
+            "titles": len(state.row_by_id),
+            "dimensions": state.vectorizer.dimensions,
+            "matrix_bytes": int(state.matrix.nbytes),
+        }
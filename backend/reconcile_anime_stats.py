@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteOne, ReplaceOne
+
+from anime_stats import compute_all, expand, flatten
+from indexes import ensure_indexes
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+WRITE_BATCH_SIZE = 1000
+# Drifted titles printed in detail
+REPORT_LIMIT = 20
+
+
+async def find_drift(db):
+    """Compare stored anime_stats with a full recount; returns {anime_id: (stored, expected)}"""
+    expected = await compute_all(db)
+    drift = {}
+    seen = set()
+    async for doc in db.anime_stats.find({}, {"_id": 0}):
+        anime_id = doc["anime_id"]
+        seen.add(anime_id)
+        stored = flatten(doc)
+        if stored != expected.get(anime_id, {}):
+            drift[anime_id] = (stored, expected.get(anime_id, {}))
+    for anime_id, counters in expected.items():
+        if anime_id not in seen:
+            drift[anime_id] = ({}, counters)
+    return drift
+
+
+async def repair(db, drift):
+    now = datetime.now(timezone.utc)
+    ops = [
+        ReplaceOne({"anime_id": anime_id}, {"anime_id": anime_id, **expand(expected), "updated_at": now}, upsert=True)
+        if expected else DeleteOne({"anime_id": anime_id})
+        for anime_id, (_, expected) in drift.items()
+    ]
+    for start in range(0, len(ops), WRITE_BATCH_SIZE):
+        await db.anime_stats.bulk_write(ops[start:start + WRITE_BATCH_SIZE], ordered=False)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Recount anime_stats from ratings and reviews and fix any drift")
+    parser.add_argument("--dry-run", action="store_true", help="report drift without rewriting anime_stats")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    drift = await find_drift(db)
+    print(f"✓ {len(drift)} titles with drifted stats")
+    for anime_id, (stored, expected) in list(drift.items())[:REPORT_LIMIT]:
+        fields = sorted(set(stored) | set(expected))
+        changes = ", ".join(f"{f} {stored.get(f, 0)} -> {expected.get(f, 0)}" for f in fields if stored.get(f, 0) != expected.get(f, 0))
+        print(f"  {anime_id}: {changes}")
+
+    if not args.dry_run and drift:
+        await ensure_indexes(db)
+        await repair(db, drift)
+        print(f"\n✅ Rewrote stats for {len(drift)} titles.")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional, Union
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from compression import COMPRESSION_MIN_SIZE, compress, negotiate_encoding, supported_encodings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, json is the fallback
+    orjson = None
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_json(content: Any) -> bytes:
+    """Serialize plain JSON-compatible content (dates allowed) to compact UTF-8 bytes"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_json_default,
+    ).encode("utf-8")
+
+
+def lean_document(model, doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Shape a trusted Mongo document like `model` without running validation
+
+    Keeps only the model's fields, fills defaults, and returns None when a
+    required field is missing. Values are passed through as stored.
+    """
+    result = {}
+    for name, field in model.model_fields.items():
+        if name in doc:
+            result[name] = doc[name]
+        elif field.is_required():
+            return None
+        else:
+            result[name] = field.get_default(call_default_factory=True)
+    return result
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available
+
+    Return it directly from a handler to bypass jsonable_encoder as well.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    """Join already-serialized JSON values into a JSON array"""
+    return b"[" + b",".join(items) + b"]"
+
+
+def json_object_with(body: bytes, **fields: Any) -> bytes:
+    """Add fields to an already-serialized, non-empty JSON object without re-encoding it"""
+    extra = b",".join(dump_json(name) + b":" + dump_json(value) for name, value in fields.items())
+    return body[:-1] + b"," + extra + b"}"
+
+
+class JSONPayload:
+    """Serialized JSON body together with its strong ETag and cached compressed variants"""
+
+    __slots__ = ("body", "etag", "_encoded")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        """Body compressed with `encoding`, computed on first use and kept for later requests"""
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+    def precompress(self) -> "JSONPayload":
+        """Compress eagerly at the highest ratio, for hot payloads built once per snapshot"""
+        if len(self.body) >= COMPRESSION_MIN_SIZE:
+            for encoding in supported_encodings():
+                self._encoded[encoding] = compress(self.body, encoding, best=True)
+        return self
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        # Each content coding is a different representation, so it gets its own strong tag
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+
+def etag_matches(request: Request, payload: JSONPayload) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    known = {payload.etag_for(encoding) for encoding in [None, *supported_encodings()]}
+    # If-None-Match uses the weak comparison function, so a W/ prefix still matches
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") in known for tag in candidates)
+
+
+def cached_json_response(request: Request, payload: Union[JSONPayload, bytes], cache_control: str) -> Response:
+    """Send pre-serialized JSON with ETag/Cache-Control, or 304 when the client copy is current
+
+    Bodies above the compression threshold are sent in the negotiated encoding
+    from the payload's cache, so CompressionMiddleware leaves them alone.
+    """
+    if not isinstance(payload, JSONPayload):
+        payload = JSONPayload(payload)
+    encoding = None
+    if len(payload.body) >= COMPRESSION_MIN_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": payload.etag_for(encoding),
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding"
+    }
+    if etag_matches(request, payload):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=payload.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=payload.encoded(encoding), media_type="application/json", headers=headers)
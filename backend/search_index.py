@@ -0,0 +1,310 @@
+import heapq
+from array import array
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Field weights for the BM25F-style score: a title hit outranks a synopsis mention
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "genres": 1.5,
+    "tags": 1.5,
+    "studio": 1.0,
+    "synopsis": 1.0,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Prefix expansions of the last query token score slightly below exact hits
+PREFIX_WEIGHT = 0.8
+MAX_PREFIX_EXPANSIONS = 50
+
+# Terms with at least this many postings keep a precomputed impact list; rarer ones are scored per query
+IMPACT_CACHE_MIN_DF = 64
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_APOSTROPHES = re.compile(r"['’‘`]")
+# Romaji long vowels are written as macrons (Shōnen), doubled vowels (Shounen, Yuuki) or plain (Shonen)
+_LONG_VOWELS = re.compile(r"ou|oo|uu")
+
+
+def normalize(text: str) -> str:
+    """Case-fold, strip accents/macrons and collapse romaji long-vowel spellings"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = _APOSTROPHES.sub("", text)
+    text = _NON_ALNUM.sub(" ", text)
+    return _LONG_VOWELS.sub(lambda m: m.group(0)[0], text)
+
+
+def tokenize(text: str) -> List[str]:
+    return normalize(text).split()
+
+
+def document_fields(doc: dict) -> Dict[str, str]:
+    return {
+        "title": doc.get("title", ""),
+        "synopsis": doc.get("synopsis", ""),
+        "studio": doc.get("studio", ""),
+        "genres": " ".join(doc.get("genres", [])),
+        "tags": " ".join(doc.get("tags", [])),
+    }
+
+
+class _TermImpacts:
+    """One term's BM25 contributions, best first, kept in flat arrays so the GC never walks them"""
+
+    __slots__ = ("neg_scores", "docs", "by_doc")
+
+    def __init__(self, by_doc: Dict[int, float]):
+        ordered = sorted((-score, doc_id) for doc_id, score in by_doc.items())
+        self.neg_scores = array("d", [entry[0] for entry in ordered])
+        self.docs = array("q", [entry[1] for entry in ordered])
+        self.by_doc = by_doc
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def best(self) -> float:
+        return -self.neg_scores[0]
+
+    def add(self, doc_id: int, score: float) -> None:
+        position = bisect_left(self.neg_scores, -score)
+        self.neg_scores.insert(position, -score)
+        self.docs.insert(position, doc_id)
+        self.by_doc[doc_id] = score
+
+    def remove(self, doc_id: int) -> None:
+        position = bisect_left(self.neg_scores, -self.by_doc.pop(doc_id))
+        while self.docs[position] != doc_id:
+            position += 1
+        del self.neg_scores[position]
+        del self.docs[position]
+
+    def ranked(self, weight: float):
+        return ((-score * weight, doc_id) for score, doc_id in zip(self.neg_scores, self.docs))
+
+
+class _InvertedIndex:
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._doc_len: Dict[int, float] = {}
+        self._doc_by_key: Dict[str, int] = {}
+        self._key_by_doc: Dict[int, str] = {}
+        self._next_doc = 0
+        self._total_len = 0.0
+        self._vocabulary: Optional[List[str]] = None
+        # Impact lists of common terms, built on rebuild and patched on add/remove. Scores of
+        # untouched documents keep the collection statistics of the last rebuild, which drift
+        # only slightly until the next one.
+        self._impacts: Dict[str, _TermImpacts] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_by_key)
+
+    def add(self, doc: dict) -> None:
+        key = doc["anime_id"]
+        if key in self._doc_by_key:
+            self.remove(key)
+        doc_id = self._next_doc
+        self._next_doc += 1
+
+        terms: Dict[str, float] = {}
+        length = 0.0
+        for field, text in document_fields(doc).items():
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                terms[token] = terms.get(token, 0.0) + weight
+                length += weight
+
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._vocabulary = None
+            postings[doc_id] = tf
+            cached = self._impacts.get(term)
+            if cached is not None:
+                cached.add(doc_id, self._impact(len(postings), tf, length))
+        self._doc_terms[doc_id] = terms
+        self._doc_len[doc_id] = length
+        self._doc_by_key[key] = doc_id
+        self._key_by_doc[doc_id] = key
+        self._total_len += length
+
+    def remove(self, key: str) -> None:
+        doc_id = self._doc_by_key.pop(key, None)
+        if doc_id is None:
+            return
+        del self._key_by_doc[doc_id]
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            cached = self._impacts.get(term)
+            if cached is not None:
+                cached.remove(doc_id)
+            if not postings:
+                del self._postings[term]
+                self._impacts.pop(term, None)
+                self._vocabulary = None
+        self._total_len -= self._doc_len.pop(doc_id)
+
+    def has_term(self, term: str) -> bool:
+        return term in self._postings
+
+    def vocabulary(self) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        return self._vocabulary
+
+    def prefix_terms(self, prefix: str, limit: int = MAX_PREFIX_EXPANSIONS) -> List[str]:
+        vocabulary = self.vocabulary()
+        start = bisect_left(vocabulary, prefix)
+        result = []
+        for term in vocabulary[start:start + limit]:
+            if not term.startswith(prefix):
+                break
+            result.append(term)
+        return result
+
+    def search(self, query: str, limit: Optional[int] = 10, prefix: bool = True) -> List[Tuple[str, float]]:
+        """Rank documents containing every query token (last one as a prefix) by BM25F score"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        expand_last = prefix and not query[-1:].isspace()
+        groups = [{token: 1.0} for token in tokens]
+        if expand_last:
+            for term in self.prefix_terms(tokens[-1]):
+                groups[-1].setdefault(term, PREFIX_WEIGHT)
+        return self.search_term_groups(groups, limit)
+
+    def _impact(self, df: int, tf: float, length: float) -> float:
+        n = len(self._doc_by_key) or 1
+        avg_len = self._total_len / n if self._total_len else length or 1.0
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+
+    def _term_impacts(self, term: str) -> _TermImpacts:
+        cached = self._impacts.get(term)
+        if cached is None:
+            postings = self._postings[term]
+            df = len(postings)
+            cached = _TermImpacts({doc_id: self._impact(df, tf, self._doc_len[doc_id]) for doc_id, tf in postings.items()})
+            if df >= IMPACT_CACHE_MIN_DF:
+                self._impacts[term] = cached
+        return cached
+
+    def prewarm(self) -> None:
+        """Build the sorted vocabulary and the common terms' impact lists ahead of the first query"""
+        self.vocabulary()
+        for term, postings in self._postings.items():
+            if len(postings) >= IMPACT_CACHE_MIN_DF:
+                self._term_impacts(term)
+
+    def search_term_groups(self, groups: List[Dict[str, float]], limit: Optional[int] = 10) -> List[Tuple[str, float]]:
+        """Score documents matching at least one term of every group; each term maps to a weight
+
+        A document's group score is its best weighted term contribution. The group
+        with the fewest postings drives the scan in impact order, and the scan stops
+        once no remaining document can beat the current top `limit`.
+        """
+        resolved = []
+        for group in groups:
+            terms = [(self._term_impacts(term), weight) for term, weight in group.items() if term in self._postings]
+            if not terms:
+                return []
+            size = sum(len(impacts) for impacts, _ in terms)
+            best = max(impacts.best() * weight for impacts, weight in terms)
+            resolved.append((size, best, terms))
+        resolved.sort(key=lambda item: item[0])
+        _, _, driver = resolved[0]
+        others = [(best, terms) for _, best, terms in resolved[1:]]
+        others_bound = sum(best for best, _ in others)
+
+        if len(driver) == 1:
+            impacts, weight = driver[0]
+            stream = impacts.ranked(weight)
+        else:
+            stream = heapq.merge(*(impacts.ranked(weight) for impacts, weight in driver), key=lambda entry: -entry[0])
+
+        top: List[Tuple[float, int]] = []
+        seen: Set[int] = set()
+        for score, doc_id in stream:
+            if limit is not None and len(top) >= limit and score + others_bound <= top[0][0]:
+                break
+            if doc_id in seen:
+                # Already scored through a higher-weighted expansion of the driving group
+                continue
+            seen.add(doc_id)
+            total = score
+            for _, terms in others:
+                group_score = 0.0
+                for impacts, weight in terms:
+                    term_score = impacts.by_doc.get(doc_id)
+                    if term_score is not None and term_score * weight > group_score:
+                        group_score = term_score * weight
+                if not group_score:
+                    break
+                total += group_score
+            else:
+                if limit is None or len(top) < limit:
+                    heapq.heappush(top, (total, doc_id))
+                elif total > top[0][0]:
+                    heapq.heapreplace(top, (total, doc_id))
+
+        ranked = sorted(top, reverse=True)
+        return [(self._key_by_doc[doc_id], score) for score, doc_id in ranked]
+
+
+class SearchIndex:
+    """In-process inverted index over anime documents with BM25F-style ranking
+
+    Full rebuilds fill a fresh index and swap it in with a single assignment, so
+    they can run in a worker thread while queries keep hitting the old one.
+    Small catalog changes are applied in place through `update`.
+    """
+
+    def __init__(self):
+        self._index = _InvertedIndex()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def rebuild(self, docs: Iterable[dict]) -> None:
+        index = _InvertedIndex()
+        for doc in docs:
+            index.add(doc)
+        index.prewarm()
+        self._index = index
+
+    def update(self, changed: Iterable[dict], removed: Iterable[str]) -> None:
+        index = self._index
+        for anime_id in removed:
+            index.remove(anime_id)
+        for doc in changed:
+            index.add(doc)
+
+    def has_term(self, term: str) -> bool:
+        return self._index.has_term(term)
+
+    def stats(self) -> Dict[str, int]:
+        index = self._index
+        return {
+            "documents": len(index),
+            "terms": len(index._postings),
+            "impact_lists": len(index._impacts),
+        }
+
+    def vocabulary(self) -> List[str]:
+        return self._index.vocabulary()
+
+    def search(self, query: str, limit: Optional[int] = 10, prefix: bool = True) -> List[Tuple[str, float]]:
+        return self._index.search(query, limit, prefix)
+
+    def search_term_groups(self, groups: List[Dict[str, float]], limit: Optional[int] = 10) -> List[Tuple[str, float]]:
+        return self._index.search_term_groups(groups, limit)
@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 from pathlib import Path
 from datetime import datetime, timezone
 import uuid
+from catalog import bump_catalog_version
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -342,7 +343,7 @@ async def seed_database():
             "genres": anime_data["genres"],
             "tags": anime_data["tags"],
             "total_episodes": anime_data["total_episodes"],
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
         await db.anime.insert_one(anime_doc)
         
@@ -363,12 +364,15 @@ async def seed_database():
                 "skip_intro_end": 180 if i > 1 else None,
                 "skip_recap_start": 10 if i > 1 else None,
                 "skip_recap_end": 90 if i > 1 else None,
-                "created_at": datetime.now(timezone.utc).isoformat()
+                "created_at": datetime.now(timezone.utc)
             }
             await db.episodes.insert_one(episode_doc)
         
         print(f"✓ Seeded {anime_data['title']} with {episode_count} episodes")
     
+    # Make running API workers reload their catalog snapshot
+    await bump_catalog_version(db)
+    
     print(f"\n✅ Database seeding completed! Seeded {len(ANIME_DATA)} anime.")
     client.close()
 
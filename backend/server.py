@@ -3,26 +3,81 @@ from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import hmac
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
 from passlib.context import CryptContext
-import httpx
+from auth_provider import AuthProvider
+from session_cache import SessionCache
+from session_tokens import TOKEN_PREFIX, RevocationList, SessionSigner
+from password_hasher import PasswordHasher
+from indexes import ensure_indexes
+from pagination import encode_cursor, decode_cursor, keyset_filter
+from trending import TrendingTracker
+from anime_stats import apply_delta, public_stats, rating_delta
+from watch_buffer import WatchProgressBuffer
+from catalog import CatalogStore
+from recommender import ContentRecommender
+from search_index import SearchIndex, tokenize
+from fuzzy_index import FuzzyIndex
+from suggest_index import SUGGEST_TOP_K, SuggestIndex
+from compression import CompressionMiddleware
+from responses import FastJSONResponse, cached_json_response, dump_json, json_object_with, lean_document
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# tz_aware: BSON dates come back as UTC-aware datetimes, comparable with datetime.now(timezone.utc)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt runs off the event loop on a bounded pool; excess attempts get 503 rather than queueing
+password_hasher = PasswordHasher(
+    pwd_context,
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', '2')),
+    max_queue=int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', '64'))
+)
+
+# Session cache (token -> resolved user)
+session_cache = SessionCache(
+    max_size=int(os.environ.get('SESSION_CACHE_SIZE', '10000')),
+    ttl_seconds=float(os.environ.get('SESSION_CACHE_TTL_SECONDS', '60'))
+)
+
+# Signed, self-verifying session tokens when SESSION_SIGNING_KEYS ("kid:secret,...", newest first) is set;
+# without it sessions stay opaque tokens looked up in user_sessions
+session_signer = SessionSigner.from_env(os.environ.get('SESSION_SIGNING_KEYS'))
+session_revocations = RevocationList(db, sync_interval=float(os.environ.get('SESSION_REVOCATION_SYNC_SECONDS', '10')))
+SESSION_TTL = timedelta(days=7)
+MAX_PROFILES_PER_USER = 5
+
+# Pooled, app-lifetime client for the OAuth session exchange
+# REMINDER: DO NOT HARDCODE THE URL, OR ADD ANY FALLBACKS OR REDIRECT URLS, THIS BREAKS THE AUTH
+auth_provider = AuthProvider(
+    "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
+    max_connections=int(os.environ.get('AUTH_HTTP_MAX_CONNECTIONS', '20')),
+    max_keepalive=int(os.environ.get('AUTH_HTTP_MAX_KEEPALIVE', '10')),
+    keepalive_expiry=float(os.environ.get('AUTH_HTTP_KEEPALIVE_SECONDS', '60'))
+)
+
+# Write-behind buffer for watch-progress heartbeats
+watch_buffer = WatchProgressBuffer(
+    db,
+    flush_interval=float(os.environ.get('WATCH_BUFFER_FLUSH_SECONDS', '5')),
+    max_pending=int(os.environ.get('WATCH_BUFFER_MAX_PENDING', '1000'))
+)
 
 # Create the main app
 app = FastAPI()
@@ -82,9 +137,21 @@ class Anime(BaseModel):
     age_rating: str
     genres: List[str]
     tags: List[str]
+    alt_titles: List[str] = []
     total_episodes: int = 0
     created_at: datetime
 
+class AnimeStats(BaseModel):
+    average_score: Optional[float] = None
+    score_count: int = 0
+    likes: int = 0
+    dislikes: int = 0
+    review_count: int = 0
+    histogram: Dict[str, int]
+
+class AnimeDetail(Anime):
+    stats: AnimeStats
+
 class Episode(BaseModel):
     model_config = ConfigDict(extra="ignore")
     episode_id: str
@@ -156,6 +223,46 @@ class ReviewCreate(BaseModel):
     spoiler: bool = False
     rating: int = Field(ge=1, le=10)
 
+# In-memory catalog replica serving the anime and episode routes
+search_index = SearchIndex()
+suggest_index = SuggestIndex()
+fuzzy_index = FuzzyIndex()
+recommender = ContentRecommender()
+
+
+def publish_trending(scores: Dict[str, float]) -> None:
+    """Runs in a worker thread after each trending refresh"""
+    suggest_index.set_popularity(scores)
+
+# Time-decayed watch activity behind /anime/trending and typeahead popularity
+trending = TrendingTracker(
+    db,
+    half_life_hours=float(os.environ.get('TRENDING_HALF_LIFE_HOURS', '24')),
+    refresh_interval=float(os.environ.get('TRENDING_REFRESH_SECONDS', '60')),
+    on_refresh=publish_trending
+)
+
+catalog = CatalogStore(
+    db,
+    anime_model=Anime,
+    episode_model=Episode,
+    refresh_interval=float(os.environ.get('CATALOG_REFRESH_SECONDS', '30')),
+    indexes=[search_index, suggest_index, fuzzy_index, recommender],
+    on_snapshot=[trending.publish]
+)
+
+# Upper bound on ranked hits considered for one search request
+SEARCH_MAX_RESULTS = 1000
+# Titles returned by /anime/{anime_id}/recommendations
+RECOMMENDATIONS_LIMIT = 10
+
+# Fewer exact hits than this triggers the typo-tolerant stage
+SEARCH_FUZZY_MIN_HITS = int(os.environ.get('SEARCH_FUZZY_MIN_HITS', '3'))
+
+# HTTP caching policy: catalog payloads may be reused briefly, reviews always revalidate
+CATALOG_CACHE_CONTROL = f"public, max-age={int(os.environ.get('CATALOG_CACHE_MAX_AGE', '60'))}"
+REVIEWS_CACHE_CONTROL = "public, no-cache"
+
 # ==================== AUTH HELPER ====================
 
 async def get_current_user(request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
@@ -168,26 +275,92 @@ async def get_current_user(request: Request, session_token: Optional[str] = Cook
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    # Find session
-    session_doc = await db.user_sessions.find_one({"session_token": token}, {"_id": 0})
-    if not session_doc:
-        raise HTTPException(status_code=401, detail="Invalid session")
-    
-    # Check expiry
-    expires_at = session_doc["expires_at"]
-    if isinstance(expires_at, str):
-        expires_at = datetime.fromisoformat(expires_at)
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
-    if expires_at < datetime.now(timezone.utc):
-        raise HTTPException(status_code=401, detail="Session expired")
-    
-    # Get user
-    user_doc = await db.users.find_one({"user_id": session_doc["user_id"]}, {"_id": 0, "password_hash": 0})
+    # Signed tokens verify in memory on every request, so a logout elsewhere also beats the cache
+    claims = None
+    if session_signer is not None and token.startswith(TOKEN_PREFIX):
+        claims = session_signer.verify(token)
+        if claims is None or session_revocations.is_revoked(claims.jti):
+            session_cache.invalidate(token)
+            raise HTTPException(status_code=401, detail="Invalid session")
+    
+    cached = session_cache.get(token)
+    if cached:
+        return cached.user
+    
+    if claims is not None:
+        user_id, expires_at = claims.user_id, claims.expires_at
+    else:
+        # Find session
+        session_doc = await db.user_sessions.find_one({"session_token": token}, {"_id": 0})
+        if not session_doc:
+            raise HTTPException(status_code=401, detail="Invalid session")
+        
+        # Check expiry; the TTL index removes expired sessions lazily (about once a minute)
+        user_id, expires_at = session_doc["user_id"], session_doc["expires_at"]
+        if isinstance(expires_at, str):
+            # Written before migrate_dates.py ran
+            expires_at = datetime.fromisoformat(expires_at)
+        if expires_at < datetime.now(timezone.utc):
+            raise HTTPException(status_code=401, detail="Session expired")
+    
+    # Get user, and their profiles for later ownership checks, in parallel
+    user_doc, profiles = await asyncio.gather(
+        db.users.find_one({"user_id": user_id}, {"_id": 0, "password_hash": 0}),
+        load_profiles(user_id)
+    )
     if not user_doc:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return User(**user_doc)
+    user = User(**user_doc)
+    session_cache.put(token, user, expires_at)
+    session_cache.set_profiles(user_id, profiles)
+    return user
+
+async def load_profiles(user_id: str) -> Dict[str, str]:
+    """profile_id -> name for every profile of the user"""
+    # Not capped at MAX_PROFILES_PER_USER: a truncated map would lock the user out of a profile
+    profiles = await db.profiles.find({"user_id": user_id}, {"_id": 0, "profile_id": 1, "name": 1}).to_list(None)
+    return {p["profile_id"]: p["name"] for p in profiles}
+
+async def require_profile(request: Request, profile_id: str, session_token: Optional[str], authorization: Optional[str]) -> Dict[str, str]:
+    """Authenticate and check profile_id belongs to the user, against the profiles cached with the session
+
+    A profile deleted on another server still passes here until this server's
+    cached map expires, i.e. for up to SESSION_CACHE_TTL_SECONDS.
+    """
+    user = await get_current_user(request, session_token, authorization)
+    profiles = session_cache.profiles(user.user_id)
+    if profiles is None or profile_id not in profiles:
+        # Not cached, or created on another server since: re-read before refusing
+        profiles = await load_profiles(user.user_id)
+        session_cache.set_profiles(user.user_id, profiles)
+    if profile_id not in profiles:
+        raise HTTPException(status_code=403, detail="Profile not found")
+    return {"profile_id": profile_id, "name": profiles[profile_id]}
+
+async def create_session(user_id: str, response: Response, provider_token: Optional[str] = None) -> str:
+    """Start a session for user_id and set the session cookie"""
+    if session_signer is not None:
+        token, _ = session_signer.issue(user_id, SESSION_TTL)
+    else:
+        token = provider_token or f"session_{uuid.uuid4().hex}"
+        now = datetime.now(timezone.utc)
+        await db.user_sessions.insert_one({
+            "user_id": user_id,
+            "session_token": token,
+            "expires_at": now + SESSION_TTL,
+            "created_at": now
+        })
+    response.set_cookie(
+        key="session_token",
+        value=token,
+        httponly=True,
+        secure=True,
+        samesite="none",
+        path="/",
+        max_age=int(SESSION_TTL.total_seconds())
+    )
+    return token
 
 # ==================== AUTH ROUTES ====================
 
@@ -199,7 +372,7 @@ async def signup(user_data: UserSignup, response: Response):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    password_hash = pwd_context.hash(user_data.password)
+    password_hash = await password_hasher.hash(user_data.password)
     
     # Create user
     user_id = f"user_{uuid.uuid4().hex[:12]}"
@@ -209,30 +382,11 @@ async def signup(user_data: UserSignup, response: Response):
         "name": user_data.name,
         "password_hash": password_hash,
         "picture": None,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     await db.users.insert_one(user_doc)
     
-    # Create session
-    session_token = f"session_{uuid.uuid4().hex}"
-    session_doc = {
-        "user_id": user_id,
-        "session_token": session_token,
-        "expires_at": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat(),
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
-    await db.user_sessions.insert_one(session_doc)
-    
-    # Set cookie
-    response.set_cookie(
-        key="session_token",
-        value=session_token,
-        httponly=True,
-        secure=True,
-        samesite="none",
-        path="/",
-        max_age=7*24*60*60
-    )
+    await create_session(user_id, response)
     
     return {"user_id": user_id, "email": user_data.email, "name": user_data.name}
 
@@ -244,29 +398,10 @@ async def login(credentials: UserLogin, response: Response):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Verify password
-    if not pwd_context.verify(credentials.password, user_doc["password_hash"]):
+    if not await password_hasher.verify(credentials.password, user_doc["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    # Create session
-    session_token = f"session_{uuid.uuid4().hex}"
-    session_doc = {
-        "user_id": user_doc["user_id"],
-        "session_token": session_token,
-        "expires_at": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat(),
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
-    await db.user_sessions.insert_one(session_doc)
-    
-    # Set cookie
-    response.set_cookie(
-        key="session_token",
-        value=session_token,
-        httponly=True,
-        secure=True,
-        samesite="none",
-        path="/",
-        max_age=7*24*60*60
-    )
+    await create_session(user_doc["user_id"], response)
     
     return {"user_id": user_doc["user_id"], "email": user_doc["email"], "name": user_doc["name"]}
 
@@ -275,14 +410,7 @@ async def process_emergent_session(session_id: str, response: Response):
     """Process Emergent Auth session_id and create user session"""
     # REMINDER: DO NOT HARDCODE THE URL, OR ADD ANY FALLBACKS OR REDIRECT URLS, THIS BREAKS THE AUTH
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-                headers={"X-Session-ID": session_id},
-                timeout=10.0
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        data = await auth_provider.session_data(session_id)
     except Exception as e:
         logger.error(f"Failed to fetch session data: {e}")
         raise HTTPException(status_code=400, detail="Invalid session ID")
@@ -297,6 +425,7 @@ async def process_emergent_session(session_id: str, response: Response):
             {"$set": {"name": data["name"], "picture": data["picture"]}}
         )
         user_id = user_doc["user_id"]
+        session_cache.invalidate_user(user_id)
     else:
         # Create new user
         user_id = f"user_{uuid.uuid4().hex[:12]}"
@@ -306,29 +435,11 @@ async def process_emergent_session(session_id: str, response: Response):
             "name": data["name"],
             "picture": data["picture"],
             "password_hash": None,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
         await db.users.insert_one(new_user)
     
-    # Create session
-    session_doc = {
-        "user_id": user_id,
-        "session_token": data["session_token"],
-        "expires_at": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat(),
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
-    await db.user_sessions.insert_one(session_doc)
-    
-    # Set cookie
-    response.set_cookie(
-        key="session_token",
-        value=data["session_token"],
-        httponly=True,
-        secure=True,
-        samesite="none",
-        path="/",
-        max_age=7*24*60*60
-    )
+    await create_session(user_id, response, provider_token=data["session_token"])
     
     return {"user_id": user_id, "email": data["email"], "name": data["name"], "picture": data["picture"]}
 
@@ -340,7 +451,12 @@ async def get_me(request: Request, session_token: Optional[str] = Cookie(None),
 @api_router.post("/auth/logout")
 async def logout(response: Response, session_token: Optional[str] = Cookie(None)):
     if session_token:
-        await db.user_sessions.delete_one({"session_token": session_token})
+        session_cache.invalidate(session_token)
+        claims = session_signer.verify(session_token) if session_signer is not None else None
+        if claims is not None:
+            await session_revocations.revoke(claims)
+        else:
+            await db.user_sessions.delete_one({"session_token": session_token})
         response.delete_cookie("session_token", path="/", samesite="none", secure=True)
     return {"message": "Logged out"}
 
@@ -350,19 +466,17 @@ async def logout(response: Response, session_token: Optional[str] = Cookie(None)
 async def get_profiles(request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
     user = await get_current_user(request, session_token, authorization)
     profiles = await db.profiles.find({"user_id": user.user_id}, {"_id": 0}).to_list(100)
-    for p in profiles:
-        if isinstance(p.get('created_at'), str):
-            p['created_at'] = datetime.fromisoformat(p['created_at'])
-    return profiles
+    session_cache.set_profiles(user.user_id, {p["profile_id"]: p["name"] for p in profiles})
+    return FastJSONResponse([lean_document(Profile, p) for p in profiles])
 
 @api_router.post("/profiles", response_model=Profile)
 async def create_profile(profile_data: ProfileCreate, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
     user = await get_current_user(request, session_token, authorization)
     
-    # Check limit (max 5 profiles)
+    # Check limit
     count = await db.profiles.count_documents({"user_id": user.user_id})
-    if count >= 5:
-        raise HTTPException(status_code=400, detail="Maximum 5 profiles allowed")
+    if count >= MAX_PROFILES_PER_USER:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_PROFILES_PER_USER} profiles allowed")
     
     profile_id = f"profile_{uuid.uuid4().hex[:12]}"
     profile_doc = {
@@ -371,221 +485,276 @@ async def create_profile(profile_data: ProfileCreate, request: Request, session_
         "name": profile_data.name,
         "avatar": profile_data.avatar,
         "is_kid": profile_data.is_kid,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     await db.profiles.insert_one(profile_doc)
-    profile_doc['created_at'] = datetime.fromisoformat(profile_doc['created_at'])
+    # Count again now that ours is in: of two creates racing past the check above, neither keeps an extra profile
+    if await db.profiles.count_documents({"user_id": user.user_id}) > MAX_PROFILES_PER_USER:
+        await db.profiles.delete_one({"profile_id": profile_id})
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_PROFILES_PER_USER} profiles allowed")
+    session_cache.invalidate_profiles(user.user_id)
     return Profile(**profile_doc)
 
 @api_router.delete("/profiles/{profile_id}")
 async def delete_profile(profile_id: str, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
     user = await get_current_user(request, session_token, authorization)
     result = await db.profiles.delete_one({"profile_id": profile_id, "user_id": user.user_id})
+    session_cache.invalidate_profiles(user.user_id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Profile not found")
+    
+    # Remove the profile's private rows too, so servers still holding it in their
+    # profile cache have nothing left to serve; ratings and reviews stay in the stats
+    watch_buffer.discard_profile(profile_id)
+    await asyncio.gather(
+        db.watch_history.delete_many({"profile_id": profile_id}),
+        db.episode_progress.delete_many({"profile_id": profile_id}),
+        db.my_list.delete_many({"profile_id": profile_id})
+    )
     return {"message": "Profile deleted"}
 
 # ==================== ANIME ROUTES ====================
 
 @api_router.get("/anime", response_model=List[Anime])
-async def get_anime(skip: int = 0, limit: int = 20, genre: Optional[str] = None, tag: Optional[str] = None, search: Optional[str] = None):
-    filter_query = {}
-    if genre:
-        filter_query["genres"] = genre
-    if tag:
-        filter_query["tags"] = tag
+async def get_anime(request: Request, skip: int = 0, limit: int = 20, cursor: Optional[str] = None, genre: Optional[str] = None, tag: Optional[str] = None, year: Optional[int] = None, studio: Optional[str] = None, search: Optional[str] = None):
+    snapshot = catalog.require()
+    limit = max(1, min(limit, 500))
+    positions = snapshot.filter_positions(genre=genre, tag=tag, year=year, studio=studio)
     if search:
-        filter_query["title"] = {"$regex": search, "$options": "i"}
-    
-    anime_list = await db.anime.find(filter_query, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
-    for a in anime_list:
-        if isinstance(a.get('created_at'), str):
-            a['created_at'] = datetime.fromisoformat(a['created_at'])
-    return anime_list
+        # Search results are in relevance order, which has no keyset; they page with skip/limit
+        if cursor:
+            raise HTTPException(status_code=400, detail="Cursor pagination is not supported with search")
+        if genre or tag or year is not None or studio:
+            allowed = set(positions)
+            positions = [p for p in search_catalog(snapshot, search) if p in allowed]
+        else:
+            positions = search_catalog(snapshot, search)
+    start = snapshot.index_after(positions, decode_cursor(cursor, 2)) if cursor else max(skip, 0)
+    page = positions[start:start + limit]
+    response = cached_json_response(request, snapshot.anime_list_json(page), CATALOG_CACHE_CONTROL)
+    if not search and start + limit < len(positions):
+        response.headers["X-Next-Cursor"] = encode_cursor(*snapshot.sort_keys[page[-1]])
+    return response
 
 @api_router.get("/anime/trending", response_model=List[Anime])
-async def get_trending():
-    # Mock trending: return random selection
-    anime_list = await db.anime.find({}, {"_id": 0}).limit(10).to_list(10)
-    for a in anime_list:
-        if isinstance(a.get('created_at'), str):
-            a['created_at'] = datetime.fromisoformat(a['created_at'])
-    return anime_list
+async def get_trending(request: Request):
+    snapshot = catalog.require()
+    return cached_json_response(request, trending.payload(snapshot) or snapshot.trending_payload, CATALOG_CACHE_CONTROL)
 
 @api_router.get("/anime/new-releases", response_model=List[Anime])
-async def get_new_releases():
-    anime_list = await db.anime.find({}, {"_id": 0}).sort("created_at", -1).limit(10).to_list(10)
-    for a in anime_list:
-        if isinstance(a.get('created_at'), str):
-            a['created_at'] = datetime.fromisoformat(a['created_at'])
-    return anime_list
-
-@api_router.get("/anime/{anime_id}", response_model=Anime)
-async def get_anime_by_id(anime_id: str):
-    anime_doc = await db.anime.find_one({"anime_id": anime_id}, {"_id": 0})
-    if not anime_doc:
+async def get_new_releases(request: Request):
+    return cached_json_response(request, catalog.require().new_releases_payload, CATALOG_CACHE_CONTROL)
+
+@api_router.get("/anime/{anime_id}", response_model=AnimeDetail)
+async def get_anime_by_id(anime_id: str, request: Request):
+    payload = catalog.require().anime_payload.get(anime_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Anime not found")
-    if isinstance(anime_doc.get('created_at'), str):
-        anime_doc['created_at'] = datetime.fromisoformat(anime_doc['created_at'])
-    return Anime(**anime_doc)
+    stats = await db.anime_stats.find_one({"anime_id": anime_id}, {"_id": 0})
+    # Live counters: revalidate on every request rather than caching for the catalog max-age
+    return cached_json_response(request, json_object_with(payload.body, stats=public_stats(stats)), REVIEWS_CACHE_CONTROL)
 
 @api_router.get("/anime/{anime_id}/episodes", response_model=List[Episode])
-async def get_episodes(anime_id: str):
-    episodes = await db.episodes.find({"anime_id": anime_id}, {"_id": 0}).sort("episode_number", 1).to_list(1000)
-    for e in episodes:
-        if isinstance(e.get('created_at'), str):
-            e['created_at'] = datetime.fromisoformat(e['created_at'])
-    return episodes
+async def get_episodes(anime_id: str, request: Request):
+    return cached_json_response(request, catalog.require().episodes_for(anime_id), CATALOG_CACHE_CONTROL)
 
 @api_router.get("/anime/{anime_id}/recommendations", response_model=List[Anime])
-async def get_recommendations(anime_id: str):
-    # Get anime
-    anime_doc = await db.anime.find_one({"anime_id": anime_id}, {"_id": 0})
-    if not anime_doc:
+async def get_recommendations(anime_id: str, request: Request):
+    snapshot = catalog.require()
+    if anime_id not in snapshot.anime_by_id:
         return []
     
-    # Find anime with similar genres
-    recommendations = await db.anime.find(
-        {"anime_id": {"$ne": anime_id}, "genres": {"$in": anime_doc["genres"]}},
-        {"_id": 0}
-    ).limit(10).to_list(10)
+    # Collaborative neighbours from the similar_items batch job come first; cold-start
+    # titles with few co-watchers are topped up from the content-based engine
+    similar = await db.similar_items.find_one({"anime_id": anime_id}, {"_id": 0, "similar.anime_id": 1})
+    ranked = [s["anime_id"] for s in (similar or {}).get("similar", [])]
+    positions = []
+    for candidate in ranked + recommender.similar(anime_id, RECOMMENDATIONS_LIMIT):
+        position = snapshot.position.get(candidate)
+        if position is not None and candidate != anime_id and position not in positions:
+            positions.append(position)
+        if len(positions) == RECOMMENDATIONS_LIMIT:
+            break
+    return cached_json_response(request, snapshot.anime_list_json(positions), CATALOG_CACHE_CONTROL)
+
+# ==================== EPISODES ====================
+
+async def get_saved_progress(profile_id: str, anime_id: str, episode_id: str) -> int:
+    """Saved progress for one episode, preferring heartbeats still in the write-behind buffer"""
+    progress = watch_buffer.pending_episodes(profile_id, anime_id).get(episode_id)
+    if progress is None:
+        progress = await db.episode_progress.find_one(
+            {"profile_id": profile_id, "anime_id": anime_id, "episode_id": episode_id},
+            {"_id": 0, "progress_seconds": 1}
+        )
+    if progress is None:
+        # Rows written before per-episode progress existed only have the resume row
+        progress = await db.watch_history.find_one(
+            {"profile_id": profile_id, "anime_id": anime_id, "episode_id": episode_id},
+            {"_id": 0, "progress_seconds": 1}
+        )
+    return progress.get("progress_seconds", 0) if progress else 0
+
+@api_router.get("/episodes/{episode_id}/context")
+async def get_episode_context(episode_id: str, request: Request, profile_id: Optional[str] = None, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
+    # Saved progress is a bonus: a stale profile or expired session still gets the episode, from 0
+    if profile_id:
+        try:
+            await require_profile(request, profile_id, session_token, authorization)
+        except HTTPException as e:
+            if e.status_code not in (401, 403):
+                raise
+            profile_id = None
+    
+    snapshot = catalog.require()
+    episode = snapshot.episode_by_id.get(episode_id)
+    if not episode:
+        raise HTTPException(status_code=404, detail="Episode not found")
+    anime_id = episode["anime_id"]
+    anime_doc = snapshot.anime_by_id.get(anime_id)
+    if not anime_doc:
+        raise HTTPException(status_code=404, detail="Anime not found")
+    
+    episodes = snapshot.episodes_by_anime[anime_id]
+    index = next(i for i, e in enumerate(episodes) if e["episode_id"] == episode_id)
+    previous_episode = episodes[index - 1] if index > 0 else None
+    next_episode = episodes[index + 1] if index + 1 < len(episodes) else None
     
-    for a in recommendations:
-        if isinstance(a.get('created_at'), str):
-            a['created_at'] = datetime.fromisoformat(a['created_at'])
-    return recommendations
+    progress = await get_saved_progress(profile_id, anime_id, episode_id) if profile_id else 0
+    
+    return FastJSONResponse({
+        "episode": episode,
+        "anime": anime_doc,
+        "episodes": episodes,
+        "previous_episode": previous_episode,
+        "next_episode": next_episode,
+        "progress_seconds": progress
+    })
 
 # ==================== WATCH HISTORY ====================
 
 @api_router.post("/watch-history")
 async def update_watch_history(history_data: WatchHistoryUpdate, profile_id: str, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, session_token, authorization)
-    
-    # Verify profile belongs to user
-    profile = await db.profiles.find_one({"profile_id": profile_id, "user_id": user.user_id}, {"_id": 0})
-    if not profile:
-        raise HTTPException(status_code=403, detail="Profile not found")
-    
-    # Update or create watch history
-    existing = await db.watch_history.find_one(
-        {"profile_id": profile_id, "anime_id": history_data.anime_id},
-        {"_id": 0}
-    )
-    
-    if existing:
-        await db.watch_history.update_one(
-            {"profile_id": profile_id, "anime_id": history_data.anime_id},
-            {"$set": {
-                "episode_id": history_data.episode_id,
-                "progress_seconds": history_data.progress_seconds,
-                "last_watched_at": datetime.now(timezone.utc).isoformat(),
-                "completed": history_data.completed
-            }}
-        )
-    else:
-        history_id = f"history_{uuid.uuid4().hex[:12]}"
-        history_doc = {
-            "history_id": history_id,
-            "profile_id": profile_id,
-            "anime_id": history_data.anime_id,
-            "episode_id": history_data.episode_id,
-            "progress_seconds": history_data.progress_seconds,
-            "last_watched_at": datetime.now(timezone.utc).isoformat(),
-            "completed": history_data.completed
-        }
-        await db.watch_history.insert_one(history_doc)
+    await require_profile(request, profile_id, session_token, authorization)
+    
+    # Coalesced in memory and flushed to Mongo in bulk by the write-behind buffer
+    watch_buffer.add(profile_id, history_data.anime_id, {
+        "episode_id": history_data.episode_id,
+        "progress_seconds": history_data.progress_seconds,
+        "last_watched_at": datetime.now(timezone.utc),
+        "completed": history_data.completed
+    })
+    # Only catalog titles count, so arbitrary ids can't grow the trending counters
+    snapshot = catalog.snapshot
+    if snapshot is not None and history_data.anime_id in snapshot.anime_by_id:
+        trending.record(history_data.anime_id)
     
     return {"message": "Watch history updated"}
 
 @api_router.get("/watch-history/{profile_id}/continue-watching")
 async def get_continue_watching(profile_id: str, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, session_token, authorization)
-    
-    # Verify profile
-    profile = await db.profiles.find_one({"profile_id": profile_id, "user_id": user.user_id}, {"_id": 0})
-    if not profile:
-        raise HTTPException(status_code=403, detail="Profile not found")
+    await require_profile(request, profile_id, session_token, authorization)
+    
+    # Get watch history joined with anime and episode details in one round trip
+    history = await db.watch_history.aggregate([
+        {"$match": {"profile_id": profile_id, "completed": False}},
+        {"$sort": {"last_watched_at": -1}},
+        {"$limit": 10},
+        {"$lookup": {"from": "anime", "localField": "anime_id", "foreignField": "anime_id", "as": "anime"}},
+        {"$unwind": "$anime"},
+        {"$lookup": {"from": "episodes", "localField": "episode_id", "foreignField": "episode_id", "as": "episode"}},
+        {"$project": {
+            "_id": 0,
+            "anime": 1,
+            "episode": {"$arrayElemAt": ["$episode", 0]},
+            "progress_seconds": 1,
+            "last_watched_at": 1
+        }},
+        {"$project": {"anime._id": 0, "episode._id": 0}}
+    ]).to_list(10)
+    
+    result = [
+        {
+            "anime": h["anime"],
+            "episode": h.get("episode"),
+            "progress_seconds": h["progress_seconds"],
+            "last_watched_at": h["last_watched_at"]
+        }
+        for h in history
+    ]
+    return FastJSONResponse(result)
+
+@api_router.get("/watch-history/{profile_id}/anime/{anime_id}/progress")
+async def get_anime_progress(profile_id: str, anime_id: str, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
+    await require_profile(request, profile_id, session_token, authorization)
+    
+    # One range scan over the (profile_id, anime_id, episode_id) index
+    rows = await db.episode_progress.find(
+        {"profile_id": profile_id, "anime_id": anime_id},
+        {"_id": 0, "profile_id": 0, "anime_id": 0}
+    ).to_list(1000)
+    
+    progress = {row["episode_id"]: row for row in rows}
+    for episode_id, pending in watch_buffer.pending_episodes(profile_id, anime_id).items():
+        progress[episode_id] = {
+            "episode_id": episode_id,
+            "progress_seconds": pending["progress_seconds"],
+            "completed": pending["completed"],
+            "last_watched_at": pending["last_watched_at"]
+        }
     
-    # Get watch history
-    history = await db.watch_history.find(
-        {"profile_id": profile_id, "completed": False},
-        {"_id": 0}
-    ).sort("last_watched_at", -1).limit(10).to_list(10)
-    
-    # Get anime details
-    result = []
-    for h in history:
-        anime_doc = await db.anime.find_one({"anime_id": h["anime_id"]}, {"_id": 0})
-        if anime_doc:
-            if isinstance(anime_doc.get('created_at'), str):
-                anime_doc['created_at'] = datetime.fromisoformat(anime_doc['created_at'])
-            episode_doc = await db.episodes.find_one({"episode_id": h["episode_id"]}, {"_id": 0})
-            result.append({
-                "anime": anime_doc,
-                "episode": episode_doc,
-                "progress_seconds": h["progress_seconds"],
-                "last_watched_at": h["last_watched_at"]
-            })
-    
-    return result
+    return FastJSONResponse(list(progress.values()))
 
 # ==================== MY LIST ====================
 
 @api_router.post("/my-list")
 async def add_to_my_list(anime_id: str, profile_id: str, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, session_token, authorization)
-    
-    # Verify profile
-    profile = await db.profiles.find_one({"profile_id": profile_id, "user_id": user.user_id}, {"_id": 0})
-    if not profile:
-        raise HTTPException(status_code=403, detail="Profile not found")
-    
-    # Check if already in list
-    existing = await db.my_list.find_one({"profile_id": profile_id, "anime_id": anime_id}, {"_id": 0})
-    if existing:
-        raise HTTPException(status_code=400, detail="Already in list")
+    await require_profile(request, profile_id, session_token, authorization)
     
     list_id = f"list_{uuid.uuid4().hex[:12]}"
     list_doc = {
         "list_id": list_id,
         "profile_id": profile_id,
         "anime_id": anime_id,
-        "added_at": datetime.now(timezone.utc).isoformat()
+        "added_at": datetime.now(timezone.utc)
     }
-    await db.my_list.insert_one(list_doc)
+    # Unique (profile_id, anime_id) index turns a duplicate add into DuplicateKeyError
+    try:
+        await db.my_list.insert_one(list_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Already in list")
     return {"message": "Added to My List"}
 
 @api_router.get("/my-list/{profile_id}")
-async def get_my_list(profile_id: str, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, session_token, authorization)
-    
-    # Verify profile
-    profile = await db.profiles.find_one({"profile_id": profile_id, "user_id": user.user_id}, {"_id": 0})
-    if not profile:
-        raise HTTPException(status_code=403, detail="Profile not found")
-    
-    # Get list
-    my_list = await db.my_list.find({"profile_id": profile_id}, {"_id": 0}).sort("added_at", -1).to_list(1000)
-    
-    # Get anime details
-    result = []
-    for item in my_list:
-        anime_doc = await db.anime.find_one({"anime_id": item["anime_id"]}, {"_id": 0})
-        if anime_doc:
-            if isinstance(anime_doc.get('created_at'), str):
-                anime_doc['created_at'] = datetime.fromisoformat(anime_doc['created_at'])
-            result.append(anime_doc)
-    
-    return result
+async def get_my_list(profile_id: str, request: Request, limit: int = 100, cursor: Optional[str] = None, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
+    await require_profile(request, profile_id, session_token, authorization)
+    
+    limit = max(1, min(limit, 500))
+    match_query = {"profile_id": profile_id}
+    if cursor:
+        match_query.update(keyset_filter("added_at", "list_id", decode_cursor(cursor, 2)))
+    
+    # Get one page of the list joined with anime details in a single round trip;
+    # the extra row only tells us whether another page exists
+    page = await db.my_list.aggregate([
+        {"$match": match_query},
+        {"$sort": {"added_at": -1, "list_id": -1}},
+        {"$limit": limit + 1},
+        {"$lookup": {"from": "anime", "localField": "anime_id", "foreignField": "anime_id", "as": "anime"}},
+        {"$project": {"_id": 0, "list_id": 1, "added_at": 1, "anime": {"$arrayElemAt": ["$anime", 0]}}},
+        {"$project": {"anime._id": 0}}
+    ]).to_list(limit + 1)
+    has_more = len(page) > limit
+    page = page[:limit]
+    
+    response = FastJSONResponse([item["anime"] for item in page if item.get("anime")])
+    if has_more:
+        response.headers["X-Next-Cursor"] = encode_cursor(page[-1]["added_at"], page[-1]["list_id"])
+    return response
 
 @api_router.delete("/my-list/{profile_id}/{anime_id}")
 async def remove_from_my_list(profile_id: str, anime_id: str, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, session_token, authorization)
-    
-    # Verify profile
-    profile = await db.profiles.find_one({"profile_id": profile_id, "user_id": user.user_id}, {"_id": 0})
-    if not profile:
-        raise HTTPException(status_code=403, detail="Profile not found")
+    await require_profile(request, profile_id, session_token, authorization)
     
     result = await db.my_list.delete_one({"profile_id": profile_id, "anime_id": anime_id})
     if result.deleted_count == 0:
@@ -597,43 +766,30 @@ async def remove_from_my_list(profile_id: str, anime_id: str, request: Request,
 
 @api_router.post("/ratings")
 async def create_rating(rating_data: RatingCreate, profile_id: str, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, session_token, authorization)
-    
-    # Verify profile
-    profile = await db.profiles.find_one({"profile_id": profile_id, "user_id": user.user_id}, {"_id": 0})
-    if not profile:
-        raise HTTPException(status_code=403, detail="Profile not found")
-    
-    # Update or create rating
-    existing = await db.ratings.find_one({"profile_id": profile_id, "anime_id": rating_data.anime_id}, {"_id": 0})
-    
-    if existing:
-        await db.ratings.update_one(
-            {"profile_id": profile_id, "anime_id": rating_data.anime_id},
-            {"$set": {"liked": rating_data.liked, "score": rating_data.score}}
-        )
-    else:
-        rating_id = f"rating_{uuid.uuid4().hex[:12]}"
-        rating_doc = {
-            "rating_id": rating_id,
-            "profile_id": profile_id,
-            "anime_id": rating_data.anime_id,
-            "liked": rating_data.liked,
-            "score": rating_data.score,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        await db.ratings.insert_one(rating_doc)
+    await require_profile(request, profile_id, session_token, authorization)
+    
+    # Update or create rating in a single round trip, keeping the previous version for the stats delta
+    new_values = {"liked": rating_data.liked, "score": rating_data.score}
+    previous = await db.ratings.find_one_and_update(
+        {"profile_id": profile_id, "anime_id": rating_data.anime_id},
+        {
+            "$set": new_values,
+            "$setOnInsert": {
+                "rating_id": f"rating_{uuid.uuid4().hex[:12]}",
+                "created_at": datetime.now(timezone.utc)
+            }
+        },
+        projection={"_id": 0, "liked": 1, "score": 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+    await apply_delta(db, rating_data.anime_id, rating_delta(previous, new_values))
     
     return {"message": "Rating saved"}
 
 @api_router.get("/ratings/{anime_id}/{profile_id}")
 async def get_rating(anime_id: str, profile_id: str, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, session_token, authorization)
-    
-    # Verify profile
-    profile = await db.profiles.find_one({"profile_id": profile_id, "user_id": user.user_id}, {"_id": 0})
-    if not profile:
-        raise HTTPException(status_code=403, detail="Profile not found")
+    await require_profile(request, profile_id, session_token, authorization)
     
     rating = await db.ratings.find_one({"profile_id": profile_id, "anime_id": anime_id}, {"_id": 0})
     if not rating:
@@ -645,12 +801,7 @@ async def get_rating(anime_id: str, profile_id: str, request: Request, session_t
 
 @api_router.post("/reviews")
 async def create_review(review_data: ReviewCreate, profile_id: str, request: Request, session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)):
-    user = await get_current_user(request, session_token, authorization)
-    
-    # Verify profile
-    profile = await db.profiles.find_one({"profile_id": profile_id, "user_id": user.user_id}, {"_id": 0})
-    if not profile:
-        raise HTTPException(status_code=403, detail="Profile not found")
+    profile = await require_profile(request, profile_id, session_token, authorization)
     
     review_id = f"review_{uuid.uuid4().hex[:12]}"
     review_doc = {
@@ -662,25 +813,94 @@ async def create_review(review_data: ReviewCreate, profile_id: str, request: Req
         "content": review_data.content,
         "spoiler": review_data.spoiler,
         "rating": review_data.rating,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     await db.reviews.insert_one(review_doc)
+    await apply_delta(db, review_data.anime_id, {"review_count": 1})
     return {"message": "Review created", "review_id": review_id}
 
 @api_router.get("/reviews/{anime_id}")
-async def get_reviews(anime_id: str):
-    reviews = await db.reviews.find({"anime_id": anime_id}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return reviews
+async def get_reviews(anime_id: str, request: Request, limit: int = 100, cursor: Optional[str] = None):
+    limit = max(1, min(limit, 100))
+    query = {"anime_id": anime_id}
+    if cursor:
+        query.update(keyset_filter("created_at", "review_id", decode_cursor(cursor, 2)))
+    # One extra row tells whether another page exists
+    reviews = await db.reviews.find(query, {"_id": 0}).sort([("created_at", -1), ("review_id", -1)]).to_list(limit + 1)
+    has_more = len(reviews) > limit
+    reviews = reviews[:limit]
+    response = cached_json_response(request, dump_json(reviews), REVIEWS_CACHE_CONTROL)
+    if has_more:
+        response.headers["X-Next-Cursor"] = encode_cursor(reviews[-1]["created_at"], reviews[-1]["review_id"])
+    return response
 
 # ==================== SEARCH ====================
 
+def search_catalog(snapshot, query: str, limit: int = SEARCH_MAX_RESULTS) -> List[int]:
+    """Catalog positions matching the query, best match first; typo-corrected matches follow exact ones"""
+    hits = search_index.search(query, limit)
+    if len(hits) < SEARCH_FUZZY_MIN_HITS:
+        groups = fuzzy_index.correct(tokenize(query), search_index.has_term)
+        if groups:
+            exact = {anime_id for anime_id, _ in hits}
+            hits += [hit for hit in search_index.search_term_groups(groups, limit) if hit[0] not in exact]
+    return [
+        snapshot.position[anime_id]
+        for anime_id, _ in hits[:limit]
+        if anime_id in snapshot.position
+    ]
+
 @api_router.get("/search")
 async def search_anime(q: str, limit: int = 10):
-    results = await db.anime.find(
-        {"title": {"$regex": q, "$options": "i"}},
-        {"_id": 0, "anime_id": 1, "title": 1, "poster_url": 1}
-    ).limit(limit).to_list(limit)
-    return results
+    snapshot = catalog.require()
+    positions = search_catalog(snapshot, q, max(1, min(limit, SEARCH_MAX_RESULTS)))
+    return FastJSONResponse([
+        {"anime_id": a["anime_id"], "title": a["title"], "poster_url": a["poster_url"]}
+        for a in (snapshot.anime[p] for p in positions)
+    ])
+
+@api_router.get("/search/suggest")
+async def suggest_anime(prefix: str, limit: int = 5):
+    """Typeahead: titles or alternate titles with a word starting with the prefix, most popular first"""
+    snapshot = catalog.require()
+    anime_ids = suggest_index.suggest(prefix, max(1, min(limit, SUGGEST_TOP_K)))
+    return FastJSONResponse([
+        {"anime_id": a["anime_id"], "title": a["title"], "poster_url": a["poster_url"]}
+        for a in (snapshot.anime_by_id[anime_id] for anime_id in anime_ids if anime_id in snapshot.anime_by_id)
+    ])
+
+# ==================== METRICS ====================
+
+# Indexes ensure_indexes could not build at startup, reported by /internal/metrics
+missing_indexes: List[str] = []
+
+# Shared secret for internal endpoints; unset disables them
+INTERNAL_API_TOKEN = os.environ.get('INTERNAL_API_TOKEN')
+
+def require_internal(x_internal_token: Optional[str]) -> None:
+    """Internal endpoints need X-Internal-Token; without a configured token they don't exist"""
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@api_router.get("/internal/metrics")
+async def get_metrics(x_internal_token: Optional[str] = Header(None)):
+    require_internal(x_internal_token)
+    return {
+        "session_cache": session_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "session_revocations": session_revocations.stats(),
+        "auth_provider": auth_provider.stats(),
+        "watch_buffer": watch_buffer.stats(),
+        "catalog": catalog.stats(),
+        "search_index": search_index.stats(),
+        "suggest_index": suggest_index.stats(),
+        "fuzzy_index": fuzzy_index.stats(),
+        "recommender": recommender.stats(),
+        "trending": trending.stats(),
+        "indexes": {"ok": not missing_indexes, "missing": missing_indexes}
+    }
 
 # Include router
 app.include_router(api_router)
@@ -691,8 +911,42 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
+@app.on_event("startup")
+async def startup_ensure_indexes():
+    missing_indexes[:] = await ensure_indexes(db)
+    if missing_indexes:
+        # Duplicate adds and ratings are only rejected by the unique indexes
+        logger.critical(f"Serving without indexes {', '.join(missing_indexes)}; run dedupe_profile_rows.py and restart")
+
+@app.on_event("startup")
+async def startup_session_revocations():
+    if session_signer is None:
+        logger.warning("SESSION_SIGNING_KEYS not set; sessions fall back to user_sessions lookups")
+        return
+    await session_revocations.sync()
+    session_revocations.start()
+
+@app.on_event("startup")
+async def startup_watch_buffer():
+    watch_buffer.start()
+
+@app.on_event("startup")
+async def startup_catalog():
+    await catalog.load()
+    catalog.start()
+    trending.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await trending.stop()
+    await session_revocations.stop()
+    await catalog.stop()
+    await watch_buffer.stop()
+    password_hasher.shutdown()
+    await auth_provider.aclose()
     client.close()
\ No newline at end of file
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set, Tuple
+import time
+
+
+@dataclass
+class CachedSession:
+    user: Any
+    expires_at: datetime
+    cached_at: float
+
+
+class SessionCache:
+    """Bounded LRU cache of resolved sessions (token -> user + expiry) with a TTL
+
+    Alongside each cached user it keeps that user's profiles (profile_id -> name)
+    for ownership checks; they expire after the same TTL and are dropped with the
+    user's last cached token.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedSession]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        # user_id -> (cached_at, profiles)
+        self._profiles_by_user: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, token: str) -> Optional[CachedSession]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        if time.monotonic() - entry.cached_at > self.ttl_seconds:
+            self._remove(token)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        if entry.expires_at < datetime.now(timezone.utc):
+            # Session itself has expired; drop it so the caller re-checks Mongo
+            self._remove(token)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return entry
+
+    def put(self, token: str, user: Any, expires_at: datetime) -> None:
+        if self.max_size <= 0:
+            return
+        if token in self._entries:
+            self._remove(token)
+        self._entries[token] = CachedSession(user=user, expires_at=expires_at, cached_at=time.monotonic())
+        self._tokens_by_user.setdefault(user.user_id, set()).add(token)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def profiles(self, user_id: str) -> Optional[Dict[str, str]]:
+        cached = self._profiles_by_user.get(user_id)
+        if cached is None:
+            return None
+        # Other servers' profile deletions only show up once this expires
+        if time.monotonic() - cached[0] > self.ttl_seconds:
+            del self._profiles_by_user[user_id]
+            return None
+        return cached[1]
+
+    def set_profiles(self, user_id: str, profiles: Dict[str, str]) -> None:
+        # Only while the user has a cached session, so the map can't outlive it
+        if user_id in self._tokens_by_user:
+            self._profiles_by_user[user_id] = (time.monotonic(), profiles)
+
+    def invalidate_profiles(self, user_id: str) -> None:
+        self._profiles_by_user.pop(user_id, None)
+
+    def invalidate(self, token: str) -> None:
+        self._remove(token)
+
+    def invalidate_user(self, user_id: str) -> None:
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self._remove(token)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokens_by_user.clear()
+        self._profiles_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry.user.user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry.user.user_id]
+                self._profiles_by_user.pop(entry.user.user_id, None)
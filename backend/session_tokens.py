@@ -0,0 +1,173 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION = "v1"
+TOKEN_PREFIX = TOKEN_VERSION + "."
+# Re-read this much revocation history on every sync so clock skew between servers can't hide a row
+REVOCATION_SYNC_OVERLAP = timedelta(seconds=60)
+
+
+@dataclass
+class SessionClaims:
+    user_id: str
+    expires_at: datetime
+    jti: str
+    kid: str
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+class SessionSigner:
+    """Stateless session tokens: v1.<kid>.<payload>.<HMAC-SHA256 signature>
+
+    The first key signs new tokens; every listed key verifies. To rotate, put the
+    new key first and keep the old one listed until its last tokens expire.
+    """
+
+    def __init__(self, keys: List[Tuple[str, bytes]]):
+        if not keys:
+            raise ValueError("at least one signing key is required")
+        self.active_kid = keys[0][0]
+        self.keys: Dict[str, bytes] = dict(keys)
+
+    @classmethod
+    def from_env(cls, value: Optional[str]) -> Optional["SessionSigner"]:
+        """Parse SESSION_SIGNING_KEYS ("kid:secret,kid:secret", newest first); None when unset"""
+        keys = []
+        for entry in (value or "").split(","):
+            if not entry.strip():
+                continue
+            kid, sep, secret = entry.strip().partition(":")
+            if not sep or not kid or not secret or "." in kid:
+                raise ValueError(f"Invalid SESSION_SIGNING_KEYS entry for key id {kid!r}")
+            keys.append((kid, secret.encode()))
+        return cls(keys) if keys else None
+
+    def _signature(self, key: bytes, signed: str) -> str:
+        return _b64encode(hmac.new(key, signed.encode(), hashlib.sha256).digest())
+
+    def issue(self, user_id: str, ttl: timedelta) -> Tuple[str, SessionClaims]:
+        expires_at = datetime.now(timezone.utc) + ttl
+        claims = SessionClaims(user_id=user_id, expires_at=expires_at, jti=uuid.uuid4().hex, kid=self.active_kid)
+        payload = _b64encode(json.dumps(
+            {"sub": user_id, "exp": int(expires_at.timestamp()), "jti": claims.jti}, separators=(",", ":")
+        ).encode())
+        signed = f"{TOKEN_VERSION}.{self.active_kid}.{payload}"
+        return f"{signed}.{self._signature(self.keys[self.active_kid], signed)}", claims
+
+    def verify(self, token: str) -> Optional[SessionClaims]:
+        """Claims of a well-formed, correctly signed and unexpired token, otherwise None"""
+        parts = token.split(".")
+        if len(parts) != 4 or parts[0] != TOKEN_VERSION:
+            return None
+        _, kid, payload, signature = parts
+        key = self.keys.get(kid)
+        if key is None:
+            return None
+        if not hmac.compare_digest(signature, self._signature(key, f"{TOKEN_VERSION}.{kid}.{payload}")):
+            return None
+        try:
+            data = json.loads(_b64decode(payload))
+            expires_at = datetime.fromtimestamp(data["exp"], timezone.utc)
+            claims = SessionClaims(user_id=data["sub"], expires_at=expires_at, jti=data["jti"], kid=kid)
+        except (ValueError, TypeError, KeyError):
+            return None
+        if expires_at < datetime.now(timezone.utc):
+            return None
+        return claims
+
+
+class RevocationList:
+    """Ids (jti) of signed sessions ended by logout, kept until the tokens would have expired anyway
+
+    revoked_sessions in Mongo is the source of truth; each server mirrors it in
+    memory and picks up other servers' logouts on its next sync.
+    """
+
+    def __init__(self, db, sync_interval: float = 10.0):
+        self.db = db
+        self.sync_interval = sync_interval
+        self._revoked: Dict[str, datetime] = {}
+        self._synced_until: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self.synced_at: Optional[float] = None
+        self.errors = 0
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    async def revoke(self, claims: SessionClaims) -> None:
+        self._revoked[claims.jti] = claims.expires_at
+        await self.db.revoked_sessions.update_one(
+            {"jti": claims.jti},
+            {"$setOnInsert": {
+                "jti": claims.jti,
+                "user_id": claims.user_id,
+                "expires_at": claims.expires_at,
+                "revoked_at": datetime.now(timezone.utc)
+            }},
+            upsert=True
+        )
+
+    async def sync(self) -> int:
+        """Pull revocations recorded since the last sync (everything unexpired on the first one)"""
+        now = datetime.now(timezone.utc)
+        query = {"expires_at": {"$gt": now}}
+        if self._synced_until is not None:
+            query["revoked_at"] = {"$gte": self._synced_until - REVOCATION_SYNC_OVERLAP}
+        added = 0
+        async for doc in self.db.revoked_sessions.find(query, {"_id": 0, "jti": 1, "expires_at": 1}):
+            if doc["jti"] not in self._revoked:
+                added += 1
+            self._revoked[doc["jti"]] = doc["expires_at"]
+        self._synced_until = now
+        self.synced_at = time.time()
+        # Expired tokens fail verification on their own; no need to remember them
+        self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+        return added
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "revoked": len(self._revoked),
+            "errors": self.errors,
+            "age_seconds": round(time.time() - self.synced_at, 3) if self.synced_at else None,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Session revocation sync error: {e}")
+            await asyncio.sleep(self.sync_interval)
@@ -0,0 +1,83 @@
+"""Local stand-in for the OAuth provider's session-data endpoint
+
+Used by tests and bench_auth_client.py. Run standalone with:
+python stub_auth_server.py [--port 8099] [--delay-ms 0]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SESSION_DATA_PATH = "/auth/v1/env/oauth/session-data"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real provider
+    protocol_version = "HTTP/1.1"
+    # One segment per response, so Nagle and delayed ACKs don't add 40 ms to every keep-alive request
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        session_id = self.headers.get("X-Session-ID")
+        if self.path != SESSION_DATA_PATH or not session_id:
+            self._send(401, {"detail": "Invalid session"})
+            return
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        self._send(200, {
+            "id": f"stub_{session_id}",
+            "email": f"{session_id}@example.com",
+            "name": f"Stub {session_id}",
+            "picture": None,
+            "session_token": f"session_stub_{session_id}",
+        })
+
+    def _send(self, status, body):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubAuthServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, delay_ms: float = 0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.delay = delay_ms / 1000
+        self.lock = threading.Lock()
+        self.connections = 0
+
+    @property
+    def session_data_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{SESSION_DATA_PATH}"
+
+    def start(self) -> "StubAuthServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a stub OAuth session-data endpoint")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubAuthServer(args.port, args.delay_ms)
+    print(f"✓ Stub auth server on {server.session_data_url}")
+    server.serve_forever()
@@ -0,0 +1,207 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+from search_index import normalize
+
+# Prefixes matching more entries than this get a precomputed top-k; the rest are scanned per request
+SUGGEST_SCAN_LIMIT = 256
+SUGGEST_TOP_K = 10
+
+# Upper bound of the normalized alphabet, used to close a prefix range
+_PREFIX_END = "\uffff"
+
+# Entry: (key, word_offset, anime_id). word_offset 0 means the key is the start of a title,
+# higher values are later words ("titan" in "attack on titan") which rank slightly lower.
+Entry = Tuple[str, int, str]
+Rank = Tuple[float, int, str, str]
+
+
+def suggestion_keys(doc: dict) -> List[Tuple[str, int]]:
+    """Word-start suffixes of the title and alternate titles, e.g. 'attack on titan', 'on titan', 'titan'"""
+    keys: Dict[str, int] = {}
+    for title in [doc.get("title", "")] + list(doc.get("alt_titles") or []):
+        words = normalize(title).split()
+        for offset in range(len(words)):
+            key = " ".join(words[offset:])
+            keys[key] = min(offset, keys.get(key, offset))
+    return list(keys.items())
+
+
+class _SuggestState:
+    def __init__(self, popularity: Dict[str, float]):
+        self.entries: List[Entry] = []
+        self.keys_by_anime: Dict[str, List[Tuple[str, int]]] = {}
+        self.titles: Dict[str, str] = {}
+        self.popularity = popularity
+        self.top: Dict[str, List[Rank]] = {}
+
+    def copy(self, popularity: Dict[str, float]) -> "_SuggestState":
+        """A state sharing no mutable containers with this one; `top` is kept only if popularity is unchanged"""
+        state = _SuggestState(popularity)
+        state.entries = list(self.entries)
+        state.keys_by_anime = dict(self.keys_by_anime)
+        state.titles = dict(self.titles)
+        if popularity is self.popularity:
+            state.top = dict(self.top)
+        return state
+
+    def rank(self, entry: Entry) -> Rank:
+        _, offset, anime_id = entry
+        return (-self.popularity.get(anime_id, 0.0), offset, self.titles[anime_id], anime_id)
+
+    def candidates(self, prefix: str) -> List[Entry]:
+        lo = bisect_left(self.entries, (prefix,))
+        hi = bisect_left(self.entries, (prefix + _PREFIX_END,), lo)
+        return self.entries[lo:hi]
+
+    def best_ranks(self, entries: Iterable[Entry], limit: int) -> List[Rank]:
+        best: Dict[str, Rank] = {}
+        for entry in entries:
+            rank = self.rank(entry)
+            current = best.get(entry[2])
+            if current is None or rank < current:
+                best[entry[2]] = rank
+        return heapq.nsmallest(limit, best.values())
+
+    def precompute(self) -> None:
+        self.top = {}
+        self._precompute_range(0, len(self.entries), 0)
+
+    def _precompute_range(self, lo: int, hi: int, depth: int) -> None:
+        """Split a sorted range sharing `depth` leading characters by the next character, recursing into large groups"""
+        entries = self.entries
+        while lo < hi and len(entries[lo][0]) <= depth:
+            lo += 1
+        while lo < hi:
+            prefix = entries[lo][0][:depth + 1]
+            end = bisect_left(entries, (prefix + _PREFIX_END,), lo, hi)
+            if end - lo > SUGGEST_SCAN_LIMIT:
+                self.top[prefix] = self.best_ranks(entries[lo:end], SUGGEST_TOP_K)
+                self._precompute_range(lo, end, depth + 1)
+            lo = end
+
+    def add(self, doc: dict) -> None:
+        anime_id = doc["anime_id"]
+        if anime_id in self.keys_by_anime:
+            self.remove(anime_id)
+        keys = suggestion_keys(doc)
+        self.keys_by_anime[anime_id] = keys
+        self.titles[anime_id] = normalize(doc.get("title", ""))
+        for key, offset in keys:
+            entry = (key, offset, anime_id)
+            insort(self.entries, entry)
+            rank = self.rank(entry)
+            for length in range(1, len(key) + 1):
+                top = self.top.get(key[:length])
+                if top is None:
+                    break
+                # Merge into the stored ranks; keep one rank per anime
+                merged = [r for r in top if r[3] != anime_id or r < rank]
+                if all(r[3] != anime_id for r in merged):
+                    merged.append(rank)
+                self.top[key[:length]] = sorted(merged)[:SUGGEST_TOP_K]
+
+    def remove(self, anime_id: str) -> None:
+        keys = self.keys_by_anime.pop(anime_id, None)
+        if keys is None:
+            return
+        for key, offset in keys:
+            entry = (key, offset, anime_id)
+            position = bisect_left(self.entries, entry)
+            if position < len(self.entries) and self.entries[position] == entry:
+                del self.entries[position]
+        for key, _ in keys:
+            for length in range(1, len(key) + 1):
+                prefix = key[:length]
+                top = self.top.get(prefix)
+                if top is None:
+                    break
+                if any(r[3] == anime_id for r in top):
+                    self.top[prefix] = self.best_ranks(self.candidates(prefix), SUGGEST_TOP_K)
+        del self.titles[anime_id]
+
+
+class SuggestIndex:
+    """Typeahead over titles and alternate titles: sorted key array plus precomputed short prefixes
+
+    Ranked by popularity (fed through `set_popularity`), then title-start matches
+    before later-word matches, then alphabetically. Every change builds a new state
+    and swaps it in, so readers never see one being modified.
+    """
+
+    # Tells CatalogStore to run update() off the event loop
+    update_in_thread = True
+
+    def __init__(self):
+        self._popularity: Dict[str, float] = {}
+        self._state = _SuggestState(self._popularity)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._state.keys_by_anime)
+
+    def rebuild(self, docs: Iterable[dict]) -> None:
+        popularity = self._popularity
+        state = _SuggestState(popularity)
+        for doc in docs:
+            anime_id = doc["anime_id"]
+            keys = suggestion_keys(doc)
+            state.keys_by_anime[anime_id] = keys
+            state.titles[anime_id] = normalize(doc.get("title", ""))
+            state.entries.extend((key, offset, anime_id) for key, offset in keys)
+        state.entries.sort()
+        while True:
+            state.popularity = popularity
+            state.precompute()
+            with self._lock:
+                # A set_popularity that landed meanwhile must not be undone by the swap
+                if self._popularity is popularity:
+                    self._state = state
+                    return
+                popularity = self._popularity
+
+    def update(self, changed: Iterable[dict], removed: Iterable[str]) -> None:
+        with self._lock:
+            state = self._state.copy(self._popularity)
+            for anime_id in removed:
+                state.remove(anime_id)
+            for doc in changed:
+                state.add(doc)
+            self._state = state
+
+    def set_popularity(self, popularity: Dict[str, float]) -> None:
+        """Replace popularity scores and re-rank; safe to run in a worker thread
+
+        The new state is built from a copy and only swapped in if no catalog
+        change landed meanwhile; otherwise the re-rank starts over.
+        """
+        while True:
+            current = self._state
+            state = current.copy(popularity)
+            state.precompute()
+            with self._lock:
+                if self._state is current:
+                    self._popularity = popularity
+                    self._state = state
+                    return
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_TOP_K) -> List[str]:
+        """Anime ids whose title or alternate title has a word starting with `prefix`, best first"""
+        key = " ".join(normalize(prefix).split())
+        if not key:
+            return []
+        state = self._state
+        top = state.top.get(key)
+        if top is None or limit > SUGGEST_TOP_K:
+            top = state.best_ranks(state.candidates(key), limit)
+        return [rank[3] for rank in top[:limit]]
+
+    def stats(self) -> Dict[str, int]:
+        state = self._state
+        return {
+            "titles": len(state.keys_by_anime),
+            "keys": len(state.entries),
+            "precomputed_prefixes": len(state.top),
+        }
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from responses import JSONPayload
+
+logger = logging.getLogger(__name__)
+
+# Scores whose decayed value falls below this are pruned from trending_scores
+TRENDING_MIN_SCORE = 0.01
+
+
+class TrendingTracker:
+    """Exponentially decayed per-anime activity counters behind /anime/trending
+
+    Heartbeats bump in-memory counters. Every `refresh_interval` the counters are
+    folded into the shared trending_scores collection, which each server decays
+    and re-ranks in the background. The ranked payload is rebuilt off the event
+    loop after every ranking and every catalog swap (publish); requests only
+    read it.
+    """
+
+    def __init__(
+        self,
+        db,
+        half_life_hours: float = 24.0,
+        refresh_interval: float = 60.0,
+        limit: int = 10,
+        on_refresh: Optional[Callable[[Dict[str, float]], None]] = None,
+    ):
+        self.db = db
+        self.half_life_seconds = half_life_hours * 3600
+        self.decay_rate = math.log(2) / self.half_life_seconds
+        self.refresh_interval = refresh_interval
+        self.limit = limit
+        self.on_refresh = on_refresh
+        # Pending activity as sum(exp(rate * (t - origin))): adding an event never touches
+        # older ones, and one multiply brings the whole sum to "now" at checkpoint time
+        self._origin = time.time()
+        self._pending: Dict[str, float] = {}
+        self.scores: Dict[str, float] = {}
+        self.ranking: List[str] = []
+        self.ranked_at: Optional[float] = None
+        self._generation = 0
+        # Latest catalog snapshot handed to publish(), and (snapshot, payload) last built for it
+        self._snapshot = None
+        self._published = (None, None)
+        self._stop_requested = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.checkpoints = 0
+        self.errors = 0
+
+    def record(self, anime_id: str, weight: float = 1.0, at: Optional[float] = None) -> None:
+        at = time.time() if at is None else at
+        self._pending[anime_id] = self._pending.get(anime_id, 0.0) + weight * math.exp(self.decay_rate * (at - self._origin))
+        self.recorded += 1
+
+    def decayed(self, score: float, updated_at: datetime, now: datetime) -> float:
+        return score * math.exp(-self.decay_rate * max((now - updated_at).total_seconds(), 0.0))
+
+    async def checkpoint(self) -> int:
+        """Fold pending activity into trending_scores, decaying stored scores to now in the same update"""
+        if not self._pending:
+            return 0
+        now = datetime.now(timezone.utc)
+        scale = math.exp(-self.decay_rate * (now.timestamp() - self._origin))
+        batch, self._pending, self._origin = self._pending, {}, now.timestamp()
+        age_seconds = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        ops = [
+            UpdateOne(
+                {"anime_id": anime_id},
+                [{"$set": {
+                    "score": {"$add": [
+                        {"$multiply": [
+                            {"$ifNull": ["$score", 0]},
+                            {"$exp": {"$multiply": [-self.decay_rate, age_seconds]}}
+                        ]},
+                        value * scale
+                    ]},
+                    "updated_at": now
+                }}],
+                upsert=True
+            )
+            for anime_id, value in batch.items()
+        ]
+        try:
+            await self.db.trending_scores.bulk_write(ops, ordered=False)
+        except BaseException as e:
+            # Requeue, re-expressed against the new origin; a cancelled write requeues too
+            for anime_id, value in batch.items():
+                self._pending[anime_id] = self._pending.get(anime_id, 0.0) + value * scale
+            if not isinstance(e, Exception):
+                raise
+            self.errors += 1
+            logger.error(f"Failed to checkpoint trending activity for {len(ops)} anime: {e}")
+            return 0
+        self.checkpoints += 1
+        return len(ops)
+
+    async def refresh(self) -> None:
+        """Checkpoint, then rank every server's combined activity as of now"""
+        await self.checkpoint()
+        now = datetime.now(timezone.utc)
+        scores = {}
+        async for doc in self.db.trending_scores.find({}, {"_id": 0, "anime_id": 1, "score": 1, "updated_at": 1}):
+            updated_at = doc["updated_at"]
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            score = self.decayed(doc["score"], updated_at, now)
+            if score >= TRENDING_MIN_SCORE:
+                scores[doc["anime_id"]] = score
+        self.scores = scores
+        self.ranking = sorted(scores, key=lambda anime_id: (-scores[anime_id], anime_id))
+        self.ranked_at = time.time()
+        self._generation += 1
+        # Ten half-lives without activity leaves under 0.1% of a score; not worth keeping
+        stale_before = now - timedelta(seconds=10 * self.half_life_seconds)
+        await self.db.trending_scores.delete_many({"updated_at": {"$lt": stale_before}})
+        if self._snapshot is not None:
+            await self.publish(self._snapshot)
+        if self.on_refresh is not None:
+            await asyncio.to_thread(self.on_refresh, scores)
+
+    def _build(self, snapshot, ranking: List[str]) -> Optional[JSONPayload]:
+        positions = [snapshot.position[a] for a in ranking if a in snapshot.position][:self.limit]
+        return JSONPayload(snapshot.anime_list_json(positions)).precompress() if positions else None
+
+    async def publish(self, snapshot) -> None:
+        """Build the trending payload for `snapshot` in a worker thread; also the catalog swap hook"""
+        self._snapshot = snapshot
+        ranking, generation = self.ranking, self._generation
+        payload = await asyncio.to_thread(self._build, snapshot, ranking)
+        # Skip if a newer snapshot or ranking was handed over meanwhile; its own publish follows
+        if snapshot is self._snapshot and generation == self._generation:
+            self._published = (snapshot, payload)
+
+    def payload(self, snapshot) -> Optional[JSONPayload]:
+        """Published trending list for this snapshot, or None before any activity was ranked"""
+        published_snapshot, payload = self._published
+        return payload if published_snapshot is snapshot else None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Let the loop finish its current refresh, then checkpoint what is still pending"""
+        if self._task is not None:
+            self._stop_requested.set()
+            await self._task
+            self._task = None
+        await self.checkpoint()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "checkpoints": self.checkpoints,
+            "errors": self.errors,
+            "ranked": len(self.ranking),
+            "age_seconds": round(time.time() - self.ranked_at, 3) if self.ranked_at else None,
+            "half_life_hours": self.half_life_seconds / 3600,
+        }
+
+    async def _run(self) -> None:
+        while not self._stop_requested.is_set():
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Trending refresh loop error: {e}")
+            try:
+                await asyncio.wait_for(self._stop_requested.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class WatchProgressBuffer:
+    """Write-behind buffer that coalesces watch-progress heartbeats per (profile, anime)
+
+    Each flush upserts the per-anime resume row into watch_history and the
+    per-episode rows into episode_progress.
+    """
+
+    def __init__(self, db, flush_interval: float = 5.0, max_pending: int = 1000):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._episode_pending: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        self._flush_requested = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self.received = 0
+        self.written = 0
+        self.flushes = 0
+        self.errors = 0
+
+    def add(self, profile_id: str, anime_id: str, progress: Dict[str, Any]) -> None:
+        """Record the latest progress for (profile, anime); older unflushed values are overwritten"""
+        key = (profile_id, anime_id)
+        self._pending[key] = progress
+        self._episode_pending.setdefault(key, {})[progress["episode_id"]] = progress
+        self.received += 1
+        if len(self._pending) >= self.max_pending:
+            self._flush_requested.set()
+
+    def pending(self, profile_id: str, anime_id: str) -> Optional[Dict[str, Any]]:
+        return self._pending.get((profile_id, anime_id))
+
+    def pending_episodes(self, profile_id: str, anime_id: str) -> Dict[str, Dict[str, Any]]:
+        """Unflushed per-episode progress for one show, keyed by episode_id"""
+        return self._episode_pending.get((profile_id, anime_id), {})
+
+    def discard_profile(self, profile_id: str) -> None:
+        """Drop unflushed progress of a deleted profile so a later flush can't recreate its rows"""
+        for key in [key for key in self._pending if key[0] == profile_id]:
+            del self._pending[key]
+            self._episode_pending.pop(key, None)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background loop and drain everything still buffered
+
+        The loop is asked to exit rather than cancelled, so a flush already in
+        flight completes (or requeues) instead of dropping its batch.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._flush_requested.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        episode_batch, self._episode_pending = self._episode_pending, {}
+        history_ops = [
+            UpdateOne(
+                {"profile_id": profile_id, "anime_id": anime_id},
+                {
+                    "$set": progress,
+                    "$setOnInsert": {"history_id": f"history_{uuid.uuid4().hex[:12]}"}
+                },
+                upsert=True
+            )
+            for (profile_id, anime_id), progress in batch.items()
+        ]
+        episode_ops = [
+            UpdateOne(
+                {"profile_id": profile_id, "anime_id": anime_id, "episode_id": episode_id},
+                {"$set": {
+                    "progress_seconds": progress["progress_seconds"],
+                    "completed": progress["completed"],
+                    "last_watched_at": progress["last_watched_at"]
+                }},
+                upsert=True
+            )
+            for (profile_id, anime_id), episodes in episode_batch.items()
+            for episode_id, progress in episodes.items()
+        ]
+        try:
+            await asyncio.gather(
+                self.db.watch_history.bulk_write(history_ops, ordered=False),
+                self.db.episode_progress.bulk_write(episode_ops, ordered=False)
+            )
+        except BaseException as e:
+            # Requeue what failed unless a newer heartbeat already replaced it; a cancelled
+            # flush requeues too, so the final drain at shutdown still writes it
+            for key, progress in batch.items():
+                self._pending.setdefault(key, progress)
+            for key, episodes in episode_batch.items():
+                pending_episodes = self._episode_pending.setdefault(key, {})
+                for episode_id, progress in episodes.items():
+                    pending_episodes.setdefault(episode_id, progress)
+            if not isinstance(e, Exception):
+                raise
+            self.errors += 1
+            logger.error(f"Failed to flush {len(history_ops)} watch history updates: {e}")
+            return 0
+        self.flushes += 1
+        self.written += len(history_ops) + len(episode_ops)
+        return len(history_ops) + len(episode_ops)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "pending_episodes": sum(len(episodes) for episodes in self._episode_pending.values()),
+            "received": self.received,
+            "written": self.written,
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "flush_interval": self.flush_interval,
+            "max_pending": self.max_pending,
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Watch history flush loop error: {e}")
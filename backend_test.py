@@ -232,6 +232,39 @@ class AnimeFlixAPITester:
         )
         return bool(response and isinstance(response, list))
 
+    def test_episode_context(self):
+        """Test get episode context"""
+        # Get an episode ID first
+        anime_list = self.run_test(
+            "Anime - Get List for Episode Context Test",
+            "GET",
+            "anime?limit=1",
+            200
+        )
+        
+        if not anime_list or len(anime_list) == 0:
+            self.log_test("Episodes - Get Context", False, "No anime found to test")
+            return False
+            
+        episodes = self.run_test(
+            "Anime - Get Episodes for Context Test",
+            "GET",
+            f"anime/{anime_list[0]['anime_id']}/episodes",
+            200
+        )
+        
+        if not episodes or len(episodes) == 0:
+            self.log_test("Episodes - Get Context", False, "No episodes found to test")
+            return False
+            
+        response = self.run_test(
+            "Episodes - Get Context",
+            "GET",
+            f"episodes/{episodes[0]['episode_id']}/context",
+            200
+        )
+        return bool(response and response.get('episode', {}).get('episode_id') == episodes[0]['episode_id'])
+
     def test_recommendations(self):
         """Test get recommendations"""
         # Get an anime ID first
@@ -351,6 +384,16 @@ class AnimeFlixAPITester:
         )
         return bool(response and isinstance(response, list))
 
+    def test_search_suggest(self):
+        """Test typeahead suggestions"""
+        response = self.run_test(
+            "Search - Suggest",
+            "GET",
+            "search/suggest?prefix=na&limit=5",
+            200
+        )
+        return bool(isinstance(response, list) and len(response) <= 5)
+
     def test_watch_history(self):
         """Test watch history operations"""
         if not self.profile_id:
@@ -428,8 +471,10 @@ class AnimeFlixAPITester:
         self.test_get_new_releases()
         self.test_anime_details()
         self.test_episodes()
+        self.test_episode_context()
         self.test_recommendations()
         self.test_search()
+        self.test_search_suggest()
         
         # Test authenticated endpoints
         self.test_auth_me()
@@ -124,6 +124,11 @@ function AnimeDetails() {
             <Badge variant="outline">{anime.year}</Badge>
             <Badge variant="outline">{anime.age_rating}</Badge>
             <Badge variant="outline">{anime.total_episodes} Episodes</Badge>
+            {anime.stats?.average_score != null && (
+              <Badge variant="outline" data-testid="anime-average-score">
+                {anime.stats.average_score} / 10 ({anime.stats.score_count})
+              </Badge>
+            )}
             {anime.genres.map((genre) => (
               <Badge key={genre} className="bg-primary/20 text-primary border-primary/50">{genre}</Badge>
             ))}
@@ -13,6 +13,8 @@ function MyList() {
   const [myList, setMyList] = useState([]);
   const [loading, setLoading] = useState(true);
   const [profile, setProfile] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const profileId = localStorage.getItem('selectedProfile');
@@ -24,10 +26,16 @@ function MyList() {
     fetchMyList(profileId);
   }, [navigate]);
 
+  const fetchPage = (profileId, cursor) => axios.get(`${API_URL}/api/my-list/${profileId}`, {
+    params: cursor ? { cursor } : {},
+    withCredentials: true
+  });
+
   const fetchMyList = async (profileId) => {
     try {
-      const response = await axios.get(`${API_URL}/api/my-list/${profileId}`, { withCredentials: true });
+      const response = await fetchPage(profileId, null);
       setMyList(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       toast.error('Failed to load My List');
     } finally {
@@ -35,10 +43,24 @@ function MyList() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const response = await fetchPage(profile, nextCursor);
+      setMyList(items => items.concat(response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      toast.error('Failed to load more of My List');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleRemove = async (animeId) => {
     try {
       await axios.delete(`${API_URL}/api/my-list/${profile}/${animeId}`, { withCredentials: true });
-      setMyList(myList.filter(anime => anime.anime_id !== animeId));
+      setMyList(items => items.filter(anime => anime.anime_id !== animeId));
       toast.success('Removed from My List');
     } catch (error) {
       toast.error('Failed to remove from list');
@@ -121,6 +143,18 @@ function MyList() {
             ))}
           </div>
         )}
+        {nextCursor && (
+          <div className="flex justify-center mt-10">
+            <Button
+              variant="outline"
+              onClick={loadMore}
+              disabled={loadingMore}
+              data-testid="load-more-btn"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
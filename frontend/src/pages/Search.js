@@ -51,8 +51,8 @@ function Search() {
 
   const fetchSuggestions = async () => {
     try {
-      const response = await axios.get(`${API_URL}/api/search`, {
-        params: { q: query, limit: 5 }
+      const response = await axios.get(`${API_URL}/api/search/suggest`, {
+        params: { prefix: query, limit: 5 }
       });
       setSuggestions(response.data);
     } catch (error) {
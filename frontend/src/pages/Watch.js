@@ -43,52 +43,30 @@ function Watch() {
 
   const fetchEpisodeData = async () => {
     try {
-      // Get all episodes to find current episode and anime
-      const episodesRes = await axios.get(`${API_URL}/api/anime`);
-      let foundEpisode = null;
-      let foundAnime = null;
-      
-      for (const anime of episodesRes.data) {
-        const eps = await axios.get(`${API_URL}/api/anime/${anime.anime_id}/episodes`);
-        const ep = eps.data.find(e => e.episode_id === episodeId);
-        if (ep) {
-          foundEpisode = ep;
-          foundAnime = anime;
-          setEpisodes(eps.data);
-          break;
-        }
-      }
-
-      if (!foundEpisode || !foundAnime) {
-        toast.error('Episode not found');
-        navigate('/');
-        return;
-      }
+      // Episode, its anime, sibling episodes and saved progress in one request
+      const profileId = localStorage.getItem('selectedProfile');
+      const contextRes = await axios.get(`${API_URL}/api/episodes/${episodeId}/context`, {
+        params: profileId ? { profile_id: profileId } : {},
+        withCredentials: true
+      });
+      const { episode: foundEpisode, anime: foundAnime, episodes: siblingEpisodes, progress_seconds } = contextRes.data;
 
+      setEpisodes(siblingEpisodes);
       setEpisode(foundEpisode);
       setAnime(foundAnime);
       setDuration(foundEpisode.duration_seconds);
 
-      // Load saved progress
-      const profileId = localStorage.getItem('selectedProfile');
-      if (profileId) {
-        try {
-          const historyRes = await axios.get(
-            `${API_URL}/api/watch-history/${profileId}/continue-watching`,
-            { withCredentials: true }
-          );
-          const savedProgress = historyRes.data.find(
-            h => h.episode.episode_id === episodeId
-          );
-          if (savedProgress && savedProgress.progress_seconds > 10) {
-            setProgress(savedProgress.progress_seconds);
-            playerRef.current?.seekTo(savedProgress.progress_seconds, 'seconds');
-          }
-        } catch (error) {
-          // No saved progress
-        }
+      // Resume from saved progress
+      if (progress_seconds > 10) {
+        setProgress(progress_seconds);
+        playerRef.current?.seekTo(progress_seconds, 'seconds');
       }
     } catch (error) {
+      if (error.response?.status === 404) {
+        toast.error('Episode not found');
+        navigate('/');
+        return;
+      }
       toast.error('Failed to load episode');
     } finally {
       setLoading(false);
@@ -0,0 +1,33 @@
+import json
+
+from anime_stats import expand, flatten, public_stats, rating_counters, rating_delta
+from responses import json_object_with
+
+
+def test_first_rating_adds_score_and_like():
+    assert rating_delta(None, {"liked": True, "score": 8}) == {
+        "score_count": 1, "score_sum": 8, "histogram.8": 1, "likes": 1
+    }
+
+
+def test_rerating_moves_histogram_bucket_and_like():
+    delta = rating_delta({"liked": True, "score": 8}, {"liked": False, "score": 3})
+    assert delta == {"score_sum": -5, "histogram.8": -1, "histogram.3": 1, "likes": -1, "dislikes": 1}
+    # Unchanged ratings produce no write
+    assert rating_delta({"liked": None, "score": 5}, {"liked": None, "score": 5}) == {}
+
+
+def test_counters_round_trip_and_public_shape():
+    counters = rating_counters({"score": 10}, 3) + rating_counters({"score": 7, "liked": True})
+    counters["review_count"] = 2
+    assert flatten(expand(counters)) == dict(counters)
+
+    stats = public_stats(expand(counters))
+    assert stats["average_score"] == 9.25
+    assert stats["histogram"]["10"] == 3 and stats["histogram"]["1"] == 0
+    assert public_stats(None)["average_score"] is None
+
+
+def test_json_object_with_appends_fields():
+    body = json_object_with(b'{"anime_id":"a"}', stats={"likes": 1})
+    assert json.loads(body) == {"anime_id": "a", "stats": {"likes": 1}}
@@ -0,0 +1,41 @@
+import asyncio
+
+import httpx
+import pytest
+
+from auth_provider import AuthProvider
+from stub_auth_server import StubAuthServer
+
+
+@pytest.fixture
+def stub():
+    server = StubAuthServer().start()
+    yield server
+    server.stop()
+
+
+def test_logins_reuse_one_pooled_connection(stub):
+    async def scenario():
+        provider = AuthProvider(stub.session_data_url)
+        try:
+            return [await provider.session_data(f"s{i}") for i in range(5)], provider.stats()
+        finally:
+            await provider.aclose()
+
+    results, stats = asyncio.run(scenario())
+    assert [r["session_token"] for r in results] == [f"session_stub_s{i}" for i in range(5)]
+    assert stub.connections == 1
+    assert stats["requests"] == 5 and stats["errors"] == 0
+
+
+def test_provider_errors_are_raised_and_counted(stub):
+    async def scenario():
+        provider = AuthProvider(stub.session_data_url + "/missing")
+        try:
+            with pytest.raises(httpx.HTTPStatusError):
+                await provider.session_data("s1")
+            return provider.stats()
+        finally:
+            await provider.aclose()
+
+    assert asyncio.run(scenario())["errors"] == 1
@@ -0,0 +1,146 @@
+import asyncio
+import gzip
+import json
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import catalog
+import responses
+from catalog import CatalogSnapshot, CatalogStore
+from pagination import decode_cursor, encode_cursor
+from server import Anime, Episode
+
+
+def make_anime(n, genres, tags, year=2020, studio="Studio A"):
+    return {
+        "anime_id": f"anime_{n}",
+        "title": f"Title {n}",
+        "synopsis": "Synopsis",
+        "poster_url": "https://example.com/poster.jpg",
+        "banner_url": "https://example.com/banner.jpg",
+        "studio": studio,
+        "year": year,
+        "age_rating": "TV-14",
+        "genres": genres,
+        "tags": tags,
+        "total_episodes": 2,
+        "created_at": f"2024-01-0{n + 1}T00:00:00+00:00",
+    }
+
+
+def make_episode(anime_n, number):
+    return {
+        "episode_id": f"episode_{anime_n}_{number}",
+        "anime_id": f"anime_{anime_n}",
+        "season_number": 1,
+        "episode_number": number,
+        "title": f"Episode {number}",
+        "thumbnail_url": "https://example.com/thumb.jpg",
+        "video_url": "https://example.com/video.mp4",
+        "duration_seconds": 1440,
+        "created_at": "2024-01-01T00:00:00+00:00",
+    }
+
+
+def build_snapshot():
+    anime = [
+        make_anime(0, ["Action"], ["Ninja"]),
+        make_anime(1, ["Action", "Drama"], ["Mecha"], year=2021),
+        make_anime(2, ["Drama"], ["Ninja"], studio="Studio B"),
+    ]
+    episodes = [make_episode(0, 2), make_episode(0, 1), make_episode(1, 1)]
+    return CatalogSnapshot((1, 3, 3), anime, episodes, Anime, Episode)
+
+
+def test_posting_lists_intersect_in_catalog_order():
+    snapshot = build_snapshot()
+    assert list(snapshot.filter_positions()) == [0, 1, 2]
+    assert snapshot.filter_positions(genre="Action") == [0, 1]
+    assert snapshot.filter_positions(genre="Action", tag="Ninja") == [0]
+    assert snapshot.filter_positions(year=2021) == [1]
+    assert snapshot.filter_positions(studio="Studio B") == [2]
+    assert snapshot.filter_positions(genre="Comedy") == []
+
+
+def test_serialized_payloads_match_documents():
+    snapshot = build_snapshot()
+    anime = json.loads(snapshot.anime_list_json([2, 0]))
+    assert [a["anime_id"] for a in anime] == ["anime_2", "anime_0"]
+    assert [a["anime_id"] for a in json.loads(snapshot.new_releases_payload.body)] == ["anime_2", "anime_1", "anime_0"]
+
+    episodes = json.loads(snapshot.episodes_for("anime_0").body)
+    assert [e["episode_number"] for e in episodes] == [1, 2]
+    assert snapshot.episodes_for("anime_missing").body == b"[]"
+
+
+def test_episode_lists_are_compressed_on_first_request_only(monkeypatch):
+    monkeypatch.setattr(responses, "COMPRESSION_MIN_SIZE", 0)
+    snapshot = build_snapshot()
+    payload = snapshot.episodes_for("anime_0")
+    assert payload._encoded == {}
+
+    body = payload.encoded("gzip")
+    assert json.loads(gzip.decompress(body)) == json.loads(payload.body)
+    assert payload.encoded("gzip") is body
+
+
+def test_cursor_resumes_after_last_sort_key():
+    anime = [make_anime(n, ["Action"] if n % 2 else ["Drama"], []) for n in range(6)]
+    # Load order must not matter: catalog order is (created_at, anime_id)
+    snapshot = CatalogSnapshot((1, 6, 0), anime[::-1], [], Anime, Episode)
+    assert [a["anime_id"] for a in snapshot.anime] == [f"anime_{n}" for n in range(6)]
+
+    positions = snapshot.filter_positions(genre="Action")
+    seen, start = [], 0
+    while start < len(positions):
+        page = positions[start:start + 2]
+        seen += [snapshot.anime[p]["anime_id"] for p in page]
+        cursor = encode_cursor(*snapshot.sort_keys[page[-1]])
+        start = snapshot.index_after(positions, decode_cursor(cursor, 2))
+    assert seen == ["anime_1", "anime_3", "anime_5"]
+
+    # A cursor whose title has since been removed still resumes at the next key
+    assert snapshot.index_after(snapshot.filter_positions(), [snapshot.sort_keys[2][0], "anime_2a"]) == 3
+
+    with pytest.raises(HTTPException):
+        snapshot.index_after(positions, ["2024-01-01", "anime_1"])
+
+
+class RecordingIndex:
+    def __init__(self, update_in_thread):
+        self.update_in_thread = update_in_thread
+        self.calls = []
+
+    def rebuild(self, docs):
+        self.calls.append(("rebuild", threading.current_thread() is threading.main_thread()))
+
+    def update(self, changed, removed):
+        self.calls.append(("update", threading.current_thread() is threading.main_thread()))
+
+
+def test_threaded_indexes_are_updated_off_the_event_loop():
+    previous = build_snapshot()
+    anime = [dict(a, title=a["title"] + "!") if a["anime_id"] == "anime_1" else a for a in previous.anime]
+    snapshot = CatalogSnapshot((2, 3, 3), anime, [], Anime, Episode)
+    inline, threaded = RecordingIndex(False), RecordingIndex(True)
+    store = CatalogStore(None, Anime, Episode, indexes=[inline, threaded])
+
+    asyncio.run(store._sync_indexes(previous, snapshot))
+
+    assert inline.calls == [("update", True)]
+    assert threaded.calls == [("update", False)]
+
+
+def test_large_diffs_rebuild_regardless_of_catalog_share(monkeypatch):
+    monkeypatch.setattr(catalog, "INCREMENTAL_UPDATE_LIMIT", 1)
+    previous = build_snapshot()
+    anime = [dict(a, title=a["title"] + "!") for a in previous.anime]
+    snapshot = CatalogSnapshot((2, 3, 3), anime, [], Anime, Episode)
+    index = RecordingIndex(False)
+    store = CatalogStore(None, Anime, Episode, indexes=[index])
+
+    asyncio.run(store._sync_indexes(previous, snapshot))
+
+    assert index.calls == [("rebuild", False)]
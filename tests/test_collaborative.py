@@ -0,0 +1,55 @@
+from collaborative import InteractionMatrix, item_neighbours, rating_weight, watch_weight
+
+
+def build(signals):
+    interactions = InteractionMatrix()
+    for profile_id, anime_id, weight in signals:
+        interactions.add(profile_id, anime_id, weight)
+    return interactions
+
+
+def neighbours(interactions, **kwargs):
+    anime_ids = interactions.anime_ids()
+    return {
+        anime_ids[item]: [anime_ids[n] for n, _, _ in similar]
+        for item, similar in item_neighbours(interactions.to_csr(), **kwargs)
+    }
+
+
+def test_signal_weights():
+    assert watch_weight({"completed": True}) > watch_weight({"completed": False})
+    assert rating_weight({"liked": True}) == 1.0
+    assert rating_weight({"score": 8}) == 0.8
+    assert rating_weight({"liked": False}) == 0.0
+    assert rating_weight({"score": 3}) == 0.0
+    assert rating_weight({}) is None
+
+
+def test_co_watched_titles_become_neighbours():
+    interactions = build([
+        ("p1", "aot", 1.0), ("p1", "vinland", 1.0),
+        ("p2", "aot", 1.0), ("p2", "vinland", 0.5),
+        ("p3", "aot", 1.0), ("p3", "kon", 1.0),
+        ("p4", "kon", 1.0), ("p4", "hibike", 1.0),
+        ("p5", "kon", 1.0), ("p5", "hibike", 1.0),
+    ])
+
+    result = neighbours(interactions, chunk=2)
+
+    assert result["aot"] == ["vinland"]
+    assert result["hibike"] == ["kon"]
+    # aot and kon share a single profile, below the default support threshold
+    assert "aot" not in result["kon"]
+    assert "aot" in neighbours(interactions, min_support=1)["kon"]
+
+
+def test_explicit_dislike_removes_watched_pair():
+    interactions = build([
+        ("p1", "aot", 1.0), ("p1", "vinland", 1.0),
+        ("p2", "aot", 1.0), ("p2", "vinland", 1.0),
+        ("p2", "vinland", 0.0),
+    ])
+
+    assert interactions.to_csr().nnz == 3
+    assert neighbours(interactions, min_support=1)["aot"] == ["vinland"]
+    assert neighbours(interactions) == {}
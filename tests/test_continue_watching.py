@@ -0,0 +1,192 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from session_cache import SessionCache
+from watch_buffer import WatchProgressBuffer
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeCollection:
+    def __init__(self, name, calls, docs=None):
+        self.name = name
+        self.calls = calls
+        self.docs = docs or []
+
+    async def find_one(self, *args, **kwargs):
+        self.calls.append((self.name, "find_one"))
+        return self.docs[0] if self.docs else None
+
+    def find(self, *args, **kwargs):
+        self.calls.append((self.name, "find"))
+        return FakeCursor(self.docs)
+
+    def aggregate(self, pipeline, **kwargs):
+        self.calls.append((self.name, "aggregate"))
+        return FakeCursor(self.docs)
+
+
+class FakeDB:
+    def __init__(self, history_rows):
+        self.calls = []
+        self.profiles = FakeCollection("profiles", self.calls, [{"profile_id": "profile_1", "name": "Main"}])
+        self.watch_history = FakeCollection("watch_history", self.calls, history_rows)
+        self.anime = FakeCollection("anime", self.calls)
+        self.episodes = FakeCollection("episodes", self.calls)
+
+
+def make_history(n):
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "anime": {"anime_id": f"anime_{i}", "title": f"Anime {i}", "created_at": now},
+            "episode": {"episode_id": f"episode_{i}", "anime_id": f"anime_{i}", "episode_number": 1},
+            "progress_seconds": 100 + i,
+            "last_watched_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+async def fake_current_user(request, session_token, authorization):
+    return server.User(
+        user_id="user_1",
+        email="viewer@example.com",
+        name="Viewer",
+        created_at=datetime.now(timezone.utc)
+    )
+
+
+@pytest.mark.parametrize("history_length", [0, 1, 10])
+def test_continue_watching_query_count_is_constant(monkeypatch, history_length):
+    fake_db = FakeDB(make_history(history_length))
+    monkeypatch.setattr(server, "db", fake_db)
+    monkeypatch.setattr(server, "session_cache", SessionCache())
+    monkeypatch.setattr(server, "get_current_user", fake_current_user)
+
+    response = asyncio.run(server.get_continue_watching("profile_1", None, None, None))
+
+    assert len(json.loads(response.body)) == history_length
+    assert fake_db.calls == [("profiles", "find"), ("watch_history", "aggregate")]
+
+
+def test_cached_profile_ownership_skips_profiles_lookup(monkeypatch):
+    fake_db = FakeDB(make_history(1))
+    cache = SessionCache()
+    user = asyncio.run(fake_current_user(None, None, None))
+    cache.put("session_1", user, datetime.now(timezone.utc) + timedelta(days=1))
+    cache.set_profiles(user.user_id, {"profile_1": "Main"})
+    monkeypatch.setattr(server, "db", fake_db)
+    monkeypatch.setattr(server, "session_cache", cache)
+    monkeypatch.setattr(server, "get_current_user", fake_current_user)
+
+    asyncio.run(server.get_continue_watching("profile_1", None, None, None))
+    assert fake_db.calls == [("watch_history", "aggregate")]
+
+    # A profile missing from the cache is re-read before the request is refused
+    with pytest.raises(server.HTTPException):
+        asyncio.run(server.get_continue_watching("profile_2", None, None, None))
+    assert fake_db.calls[-1] == ("profiles", "find")
+
+
+def test_continue_watching_response_shape(monkeypatch):
+    fake_db = FakeDB(make_history(1))
+    monkeypatch.setattr(server, "db", fake_db)
+    monkeypatch.setattr(server, "session_cache", SessionCache())
+    monkeypatch.setattr(server, "get_current_user", fake_current_user)
+
+    response = asyncio.run(server.get_continue_watching("profile_1", None, None, None))
+    result = json.loads(response.body)
+
+    assert set(result[0]) == {"anime", "episode", "progress_seconds", "last_watched_at"}
+    assert result[0]["anime"]["anime_id"] == "anime_0"
+    assert result[0]["episode"]["episode_id"] == "episode_0"
+
+
+class FakeDeleteCollection:
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    async def delete_one(self, query):
+        self.calls.append((self.name, "delete_one", query))
+        return SimpleNamespace(deleted_count=1)
+
+    async def delete_many(self, query):
+        self.calls.append((self.name, "delete_many", query))
+        return SimpleNamespace(deleted_count=3)
+
+
+def test_deleting_a_profile_removes_its_rows(monkeypatch):
+    calls = []
+    fake_db = SimpleNamespace(**{
+        name: FakeDeleteCollection(name, calls)
+        for name in ("profiles", "watch_history", "episode_progress", "my_list")
+    })
+    buffer = WatchProgressBuffer(fake_db)
+    buffer.add("profile_1", "anime_1", {"episode_id": "episode_1", "progress_seconds": 10})
+    monkeypatch.setattr(server, "db", fake_db)
+    monkeypatch.setattr(server, "watch_buffer", buffer)
+    monkeypatch.setattr(server, "session_cache", SessionCache())
+    monkeypatch.setattr(server, "get_current_user", fake_current_user)
+
+    asyncio.run(server.delete_profile("profile_1", None, None, None))
+
+    assert calls[0] == ("profiles", "delete_one", {"profile_id": "profile_1", "user_id": "user_1"})
+    assert sorted(call[0] for call in calls[1:]) == ["episode_progress", "my_list", "watch_history"]
+    assert all(call[1:] == ("delete_many", {"profile_id": "profile_1"}) for call in calls[1:])
+    assert buffer.pending("profile_1", "anime_1") is None
+
+
+class FakeProfiles:
+    def __init__(self, docs, counts):
+        self.docs = docs
+        self.counts = list(counts)
+        self.deleted = []
+
+    def find(self, *args, **kwargs):
+        return FakeCursor(self.docs)
+
+    async def count_documents(self, query):
+        return self.counts.pop(0)
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+
+    async def delete_one(self, query):
+        self.deleted.append(query)
+
+
+def test_profile_created_in_a_race_past_the_cap_is_rolled_back(monkeypatch):
+    # Another create landed between our limit check and our insert
+    profiles = FakeProfiles([], counts=[server.MAX_PROFILES_PER_USER - 1, server.MAX_PROFILES_PER_USER + 1])
+    monkeypatch.setattr(server, "db", SimpleNamespace(profiles=profiles))
+    monkeypatch.setattr(server, "session_cache", SessionCache())
+    monkeypatch.setattr(server, "get_current_user", fake_current_user)
+
+    with pytest.raises(server.HTTPException) as exc:
+        asyncio.run(server.create_profile(server.ProfileCreate(name="Extra", avatar="a.png"), None, None, None))
+
+    assert exc.value.status_code == 400
+    assert profiles.deleted == [{"profile_id": profiles.docs[0]["profile_id"]}]
+
+
+def test_ownership_map_is_not_truncated_at_the_cap(monkeypatch):
+    docs = [{"profile_id": f"profile_{i}", "name": f"P{i}"} for i in range(server.MAX_PROFILES_PER_USER + 1)]
+    monkeypatch.setattr(server, "db", SimpleNamespace(profiles=FakeProfiles(docs, counts=[])))
+    monkeypatch.setattr(server, "session_cache", SessionCache())
+    monkeypatch.setattr(server, "get_current_user", fake_current_user)
+
+    profile_id = docs[-1]["profile_id"]
+    assert asyncio.run(server.require_profile(None, profile_id, None, None))["profile_id"] == profile_id
@@ -0,0 +1,34 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from tests.test_catalog import build_snapshot
+
+
+class FakeStore:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def require(self):
+        return self.snapshot
+
+
+@pytest.mark.parametrize("status", [401, 403])
+def test_unusable_profile_still_returns_episode_without_progress(monkeypatch, status):
+    async def reject(request, profile_id, session_token, authorization):
+        raise HTTPException(status_code=status, detail="nope")
+
+    async def no_progress_lookup(*args):
+        raise AssertionError("progress must not be read for an unowned profile")
+
+    monkeypatch.setattr(server, "catalog", FakeStore(build_snapshot()))
+    monkeypatch.setattr(server, "require_profile", reject)
+    monkeypatch.setattr(server, "get_saved_progress", no_progress_lookup)
+
+    response = asyncio.run(server.get_episode_context("episode_0_1", None, "profile_stale", None, None))
+    body = json.loads(response.body)
+    assert body["episode"]["episode_id"] == "episode_0_1"
+    assert body["progress_seconds"] == 0
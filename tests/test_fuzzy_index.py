@@ -0,0 +1,43 @@
+from fuzzy_index import FuzzyIndex, edit_distance
+from search_index import SearchIndex, tokenize
+
+DOCS = [
+    {"anime_id": "jjk", "title": "Jujutsu Kaisen"},
+    {"anime_id": "csm", "title": "Chainsaw Man"},
+    {"anime_id": "aot", "title": "Attack on Titan"},
+]
+
+
+def fuzzy_search(query):
+    search, fuzzy = SearchIndex(), FuzzyIndex()
+    search.rebuild(DOCS)
+    fuzzy.rebuild(DOCS)
+    groups = fuzzy.correct(tokenize(query), search.has_term)
+    return [key for key, _ in search.search_term_groups(groups)] if groups else []
+
+
+def test_edit_distance_counts_adjacent_swaps_once():
+    assert edit_distance("kaisan", "kaisen", 2) == 1
+    assert edit_distance("jujustu", "jujutsu", 2) == 1
+    assert edit_distance("naruto", "bleach", 2) == 3
+
+
+def test_typos_and_run_together_words_are_corrected():
+    assert fuzzy_search("jujutsu kaisan") == ["jjk"]
+    assert fuzzy_search("atack on titen") == ["aot"]
+    assert fuzzy_search("chainsawman") == ["csm"]
+
+
+def test_short_tokens_and_unknown_words_are_not_fuzzed():
+    assert fuzzy_search("jujutsu xyzzyq") == []
+    assert FuzzyIndex().lookup("ab") == []
+
+
+def test_incremental_update_drops_removed_terms():
+    fuzzy = FuzzyIndex()
+    fuzzy.rebuild(DOCS)
+    fuzzy.update([{"anime_id": "frn", "title": "Frieren"}], ["jjk"])
+
+    assert fuzzy.lookup("kaisan") == []
+    assert fuzzy.lookup("freiren") == [("frieren", 1)]
+    assert len(fuzzy) == 5
@@ -0,0 +1,74 @@
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+from indexes import INDEXES, ROUTE_QUERIES, audit_indexes, ensure_indexes, print_audit
+
+IXSCAN_PLAN = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "fake"}}
+COLLSCAN_PLAN = {"stage": "SORT", "inputStage": {"stage": "COLLSCAN", "direction": "forward"}}
+
+
+class FakeCursor:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def sort(self, keys):
+        return self
+
+    async def explain(self):
+        return {"queryPlanner": {"winningPlan": self.plan}}
+
+
+class FakeCollection:
+    def __init__(self, name, db):
+        self.name = name
+        self.db = db
+
+    def find(self, filter):
+        return FakeCursor(COLLSCAN_PLAN if self.name in self.db.unindexed else IXSCAN_PLAN)
+
+    async def create_indexes(self, models):
+        # Duplicate rows only block unique indexes
+        if self.name in self.db.failing and any(model.document.get("unique") for model in models):
+            raise OperationFailure("E11000 duplicate key error")
+        names = [model.document["name"] for model in models]
+        self.db.created.setdefault(self.name, []).extend(names)
+        return names
+
+
+class FakeDB:
+    def __init__(self, unindexed=(), failing=()):
+        self.unindexed = set(unindexed)
+        self.failing = set(failing)
+        self.created = {}
+
+    def __getitem__(self, name):
+        return FakeCollection(name, self)
+
+
+def test_audit_passes_when_every_route_uses_an_index(capsys):
+    report = asyncio.run(audit_indexes(FakeDB()))
+
+    assert len(report) == len(ROUTE_QUERIES)
+    assert all(stages == ["FETCH", "IXSCAN"] for _, _, stages in report)
+    assert print_audit(report) == 0
+
+
+def test_audit_fails_on_collection_scan(capsys):
+    report = asyncio.run(audit_indexes(FakeDB(unindexed={"my_list"})))
+
+    scanned = [route for route, collection, stages in report if "COLLSCAN" in stages]
+    assert scanned == [q["route"] for q in ROUTE_QUERIES if q["collection"] == "my_list"]
+    assert print_audit(report) == 1
+    assert "❌ GET /my-list/{profile_id} [my_list]: SORT -> COLLSCAN" in capsys.readouterr().out
+
+
+def test_ensure_indexes_reports_failures_and_builds_the_rest(caplog):
+    db = FakeDB(failing={"users", "my_list"})
+    failed = asyncio.run(ensure_indexes(db))
+
+    assert failed == ["users.user_id_unique", "users.email_unique", "my_list.profile_id_anime_id_unique"]
+    assert set(db.created) == set(INDEXES) - {"users"}
+    # The sort index still gets built next to the blocked unique one
+    assert db.created["my_list"] == ["profile_id_added_at_list_id"]
+    assert "Failed to ensure index profile_id_anime_id_unique on my_list" in caplog.text
@@ -0,0 +1,155 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from pagination import decode_cursor, encode_cursor, keyset_filter
+from session_cache import SessionCache
+
+
+def test_datetime_sort_keys_round_trip_as_dates():
+    added_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    values = decode_cursor(encode_cursor(added_at, "list_1"), 2)
+    assert values == [added_at, "list_1"]
+    assert keyset_filter("added_at", "list_id", values)["$or"][0] == {"added_at": {"$lt": added_at}}
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    encode_cursor("only-one"),
+    encode_cursor({"$date": 5}, "list_1"),
+    encode_cursor({"$where": "1"}, "list_1"),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, 2)
+    assert exc.value.status_code == 400
+
+
+def matches(row, query):
+    """Just enough of Mongo's matching for the keyset filters get_my_list builds"""
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(row, branch) for branch in condition):
+                return False
+        elif isinstance(condition, dict):
+            op, value = next(iter(condition.items()))
+            if not (row[key] < value if op == "$lt" else row[key] > value):
+                return False
+        elif row[key] != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeMyList:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def aggregate(self, pipeline, **kwargs):
+        stages = {next(iter(stage)): next(iter(stage.values())) for stage in pipeline}
+        rows = [row for row in self.rows if matches(row, stages["$match"])]
+        rows.sort(key=lambda row: (row["added_at"], row["list_id"]), reverse=True)
+        rows = rows[:stages["$limit"]]
+        return FakeCursor([
+            {"list_id": row["list_id"], "added_at": row["added_at"], "anime": {"anime_id": row["anime_id"]}}
+            for row in rows
+        ])
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.my_list = FakeMyList(rows)
+
+
+async def fake_current_user(request, session_token, authorization):
+    return server.User(user_id="user_1", email="viewer@example.com", name="Viewer", created_at=datetime.now(timezone.utc))
+
+
+def make_list(n, same_time=False):
+    start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "profile_id": "profile_1",
+            "list_id": f"list_{i:02d}",
+            "anime_id": f"anime_{i:02d}",
+            "added_at": start if same_time else start + timedelta(minutes=i),
+        }
+        for i in range(n)
+    ]
+
+
+def fetch_all_pages(monkeypatch, rows, limit):
+    cache = SessionCache()
+    user = asyncio.run(fake_current_user(None, None, None))
+    cache.put("session_1", user, datetime.now(timezone.utc) + timedelta(days=1))
+    cache.set_profiles(user.user_id, {"profile_1": "Main"})
+    monkeypatch.setattr(server, "db", FakeDB(rows))
+    monkeypatch.setattr(server, "session_cache", cache)
+    monkeypatch.setattr(server, "get_current_user", fake_current_user)
+    pages, cursor = [], None
+    while True:
+        response = asyncio.run(server.get_my_list("profile_1", None, limit, cursor, None, None))
+        pages.append([anime["anime_id"] for anime in json.loads(response.body)])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("same_time", [False, True])
+def test_my_list_pages_cover_every_row_once(monkeypatch, same_time):
+    rows = make_list(7, same_time=same_time)
+    pages = fetch_all_pages(monkeypatch, rows, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    expected = [row["anime_id"] for row in sorted(rows, key=lambda r: (r["added_at"], r["list_id"]), reverse=True)]
+    assert [anime_id for page in pages for anime_id in page] == expected
+
+
+def test_full_last_page_has_no_next_cursor(monkeypatch):
+    pages = fetch_all_pages(monkeypatch, make_list(6), limit=3)
+    assert [len(page) for page in pages] == [3, 3]
+
+
+class FakeReviews:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def find(self, query, projection=None):
+        self.matched = [row for row in self.rows if matches(row, query)]
+        return self
+
+    def sort(self, keys):
+        self.matched.sort(key=lambda row: (row["created_at"], row["review_id"]), reverse=True)
+        return FakeCursor(self.matched)
+
+
+def test_review_pages_stop_after_a_full_last_page(monkeypatch):
+    start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    rows = [
+        {"anime_id": "anime_1", "review_id": f"review_{i}", "created_at": start + timedelta(minutes=i // 2)}
+        for i in range(6)
+    ]
+    monkeypatch.setattr(server, "db", SimpleNamespace(reviews=FakeReviews(rows)))
+    request = SimpleNamespace(headers={})
+
+    pages, cursor = [], None
+    while True:
+        response = asyncio.run(server.get_reviews("anime_1", request, 3, cursor))
+        pages.append([review["review_id"] for review in json.loads(response.body)])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert pages == [["review_5", "review_4", "review_3"], ["review_2", "review_1", "review_0"]]
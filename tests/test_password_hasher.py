@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from password_hasher import PasswordHasher
+
+
+class BlockingContext:
+    """Stand-in for a CryptContext whose calls block until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def hash(self, password):
+        self.release.wait(5)
+        return f"hashed:{password}"
+
+    def verify(self, password, password_hash):
+        self.release.wait(5)
+        return password_hash == f"hashed:{password}"
+
+
+def test_rejects_beyond_queue_limit_and_recovers():
+    async def scenario():
+        context = BlockingContext()
+        hasher = PasswordHasher(context, workers=1, max_queue=1)
+        running = [asyncio.create_task(hasher.hash("a")), asyncio.create_task(hasher.hash("b"))]
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc:
+            await hasher.verify("c", "hashed:c")
+        assert exc.value.status_code == 503
+
+        context.release.set()
+        assert await asyncio.gather(*running) == ["hashed:a", "hashed:b"]
+        assert await hasher.verify("c", "hashed:c")
+        await asyncio.sleep(0)
+        stats = hasher.stats()
+        hasher.shutdown()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
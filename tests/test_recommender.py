@@ -0,0 +1,51 @@
+import numpy as np
+
+from recommender import ContentRecommender
+
+DOCS = [
+    {"anime_id": "aot", "title": "Attack on Titan", "genres": ["Action", "Drama"], "tags": ["Military", "Titans"],
+     "studio": "Wit Studio", "year": 2013, "synopsis": "Humanity fights titans behind giant walls."},
+    {"anime_id": "vinland", "title": "Vinland Saga", "genres": ["Action", "Drama"], "tags": ["Military", "Revenge"],
+     "studio": "Wit Studio", "year": 2019, "synopsis": "A young warrior seeks revenge behind enemy lines."},
+    {"anime_id": "kon", "title": "K-On!", "genres": ["Comedy", "Slice of Life"], "tags": ["Music", "School"],
+     "studio": "Kyoto Animation", "year": 2009, "synopsis": "Girls form a music club at school."},
+    {"anime_id": "hibike", "title": "Sound! Euphonium", "genres": ["Drama", "Slice of Life"], "tags": ["Music", "School"],
+     "studio": "Kyoto Animation", "year": 2015, "synopsis": "A school band practices music."},
+]
+
+
+def test_most_similar_title_comes_first():
+    recommender = ContentRecommender()
+    recommender.rebuild(DOCS)
+
+    assert recommender.similar("aot", 1) == ["vinland"]
+    assert recommender.similar("kon", 1) == ["hibike"]
+    assert "aot" not in recommender.similar("aot")
+
+
+def test_incremental_update_matches_full_recompute():
+    recommender = ContentRecommender()
+    recommender.rebuild(DOCS)
+    recommender.update([dict(DOCS[2], anime_id="kon2"), dict(DOCS[0], genres=["Comedy"])], ["vinland"])
+
+    incremental = {anime_id: recommender.similar(anime_id) for anime_id in ("aot", "kon", "kon2", "hibike")}
+    state = recommender._state
+    state.recompute(np.flatnonzero(state.alive[:state.size]))
+
+    assert incremental == {anime_id: recommender.similar(anime_id) for anime_id in incremental}
+    assert recommender.similar("vinland") == []
+    assert recommender.similar("kon", 1) == ["kon2"]
+
+
+def test_update_swaps_in_a_new_state():
+    recommender = ContentRecommender()
+    recommender.rebuild(DOCS)
+    before = recommender._state
+    neighbours = before.neighbour_rows.copy()
+
+    recommender.update([dict(DOCS[0], genres=["Comedy"])], ["vinland"])
+
+    # Readers holding the old state keep a consistent view
+    assert recommender._state is not before
+    assert np.array_equal(before.neighbour_rows, neighbours)
+    assert "vinland" in before.row_by_id
@@ -0,0 +1,68 @@
+import gzip
+
+from starlette.requests import Request
+
+from compression import COMPRESSION_MIN_SIZE, negotiate_encoding
+from responses import JSONPayload, cached_json_response
+
+
+def make_request(if_none_match=None, accept_encoding=None):
+    headers = []
+    if if_none_match:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    if accept_encoding:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_full_body_carries_etag_and_cache_control():
+    payload = JSONPayload(b'[{"anime_id":"anime_1"}]')
+    response = cached_json_response(make_request(), payload, "public, max-age=60")
+
+    assert response.status_code == 200
+    assert response.body == payload.body
+    assert response.headers["etag"] == payload.etag
+    assert response.headers["cache-control"] == "public, max-age=60"
+
+
+def test_matching_if_none_match_returns_304():
+    payload = JSONPayload(b"[]")
+    for header in (payload.etag, f'"stale", {payload.etag}', f"W/{payload.etag}", "*"):
+        response = cached_json_response(make_request(header), payload, "public, no-cache")
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == payload.etag
+
+
+def test_stale_etag_gets_new_body():
+    response = cached_json_response(make_request('"stale"'), b"[1]", "public, no-cache")
+    assert response.status_code == 200
+    assert response.body == b"[1]"
+
+
+def test_negotiate_encoding_respects_quality_values():
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+
+
+def test_large_payload_is_served_from_compressed_cache():
+    payload = JSONPayload(b"[" + b",".join([b'{"title":"Naruto"}'] * COMPRESSION_MIN_SIZE) + b"]")
+    request = make_request(accept_encoding="gzip")
+
+    first = cached_json_response(request, payload, "public, max-age=60")
+    second = cached_json_response(request, payload, "public, max-age=60")
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(first.body) == payload.body
+    assert second.body is payload.encoded("gzip")
+    assert first.headers["etag"] != payload.etag
+
+    revalidated = cached_json_response(make_request(first.headers["etag"], "gzip"), payload, "public, max-age=60")
+    assert revalidated.status_code == 304
+
+
+def test_small_payload_is_sent_uncompressed():
+    response = cached_json_response(make_request(accept_encoding="gzip"), JSONPayload(b"[]"), "public, no-cache")
+    assert "content-encoding" not in response.headers
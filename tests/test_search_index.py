@@ -0,0 +1,41 @@
+from search_index import SearchIndex, normalize
+
+
+def make_index():
+    index = SearchIndex()
+    index.rebuild([
+        {"anime_id": "aot", "title": "Attack on Titan", "synopsis": "Humanity fights giants.", "genres": ["Action"]},
+        {"anime_id": "mha", "title": "My Hero Academia", "synopsis": "A boy without powers wants to be a hero."},
+        {"anime_id": "opm", "title": "One Punch Man", "synopsis": "A hero who wins with one punch.", "genres": ["Comedy"]},
+        {"anime_id": "shonen", "title": "Shōnen Tales", "synopsis": "Stories.", "tags": ["Yuuki"]},
+    ])
+    return index
+
+
+def keys(results):
+    return [key for key, _ in results]
+
+
+def test_normalize_folds_accents_and_long_vowels():
+    assert normalize("Shōnen") == normalize("Shounen") == normalize("shonen")
+    assert normalize("JoJo's") == "jojos"
+
+
+def test_title_hits_outrank_synopsis_mentions():
+    assert keys(make_index().search("hero")) == ["mha", "opm"]
+
+
+def test_all_tokens_must_match_and_last_token_is_a_prefix():
+    index = make_index()
+    assert keys(index.search("attack tit")) == ["aot"]
+    assert keys(index.search("attack tit ")) == []
+    assert keys(index.search("shounen")) == ["shonen"]
+
+
+def test_incremental_update_matches_rebuild():
+    index = make_index()
+    index.update([{"anime_id": "opm", "title": "One Punch Man", "synopsis": "Saitama."}], ["mha"])
+
+    assert keys(index.search("hero")) == []
+    assert keys(index.search("saitama")) == ["opm"]
+    assert len(index) == 3
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import server
+import session_cache as session_cache_module
+from session_cache import SessionCache
+
+
+def user(user_id):
+    return SimpleNamespace(user_id=user_id)
+
+
+def later(days=1):
+    return datetime.now(timezone.utc) + timedelta(days=days)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(session_cache_module.time, "monotonic", lambda: clock[0])
+    cache = SessionCache(ttl_seconds=60)
+    cache.put("token_1", user("user_1"), later())
+
+    clock[0] += 59
+    assert cache.get("token_1").user.user_id == "user_1"
+    clock[0] += 2
+    assert cache.get("token_1") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_expired_sessions_are_not_served():
+    cache = SessionCache()
+    cache.put("token_1", user("user_1"), later(days=-1))
+    assert cache.get("token_1") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SessionCache(max_size=2)
+    cache.put("token_1", user("user_1"), later())
+    cache.put("token_2", user("user_2"), later())
+    cache.get("token_1")
+    cache.put("token_3", user("user_3"), later())
+
+    assert cache.get("token_2") is None
+    assert cache.get("token_1") is not None
+    assert cache.get("token_3") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidation_by_token_and_by_user():
+    cache = SessionCache()
+    cache.put("phone", user("user_1"), later())
+    cache.put("laptop", user("user_1"), later())
+    cache.put("other", user("user_2"), later())
+    cache.set_profiles("user_1", {"profile_1": "Main"})
+
+    cache.invalidate("phone")  # logout on one device
+    assert cache.get("phone") is None
+    assert cache.get("laptop") is not None
+    assert cache.profiles("user_1") == {"profile_1": "Main"}
+
+    cache.invalidate_user("user_1")
+    assert cache.get("laptop") is None
+    assert cache.get("other") is not None
+    # Profiles go with the user's last cached session
+    assert cache.profiles("user_1") is None
+
+
+def test_cached_profiles_expire_after_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(session_cache_module.time, "monotonic", lambda: clock[0])
+    cache = SessionCache(ttl_seconds=60)
+    cache.put("phone", user("user_1"), later())
+    cache.set_profiles("user_1", {"profile_1": "Main"})
+
+    # A fresher session must not keep a stale profile map alive
+    clock[0] += 50
+    cache.put("laptop", user("user_1"), later())
+    clock[0] += 11
+    assert cache.get("laptop") is not None
+    assert cache.profiles("user_1") is None
+
+
+def test_metrics_require_internal_token(monkeypatch):
+    monkeypatch.setattr(server, "INTERNAL_API_TOKEN", None)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(server.get_metrics("anything"))
+    assert exc.value.status_code == 404
+
+    monkeypatch.setattr(server, "INTERNAL_API_TOKEN", "s3cret")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(server.get_metrics("wrong"))
+    assert exc.value.status_code == 403
+    assert "session_cache" in asyncio.run(server.get_metrics("s3cret"))
+
+
+def test_metrics_flag_missing_indexes(monkeypatch):
+    monkeypatch.setattr(server, "INTERNAL_API_TOKEN", "s3cret")
+    monkeypatch.setattr(server, "missing_indexes", ["my_list.profile_id_anime_id_unique"])
+
+    indexes = asyncio.run(server.get_metrics("s3cret"))["indexes"]
+    assert indexes == {"ok": False, "missing": ["my_list.profile_id_anime_id_unique"]}
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from session_tokens import RevocationList, SessionSigner
+
+
+def test_issued_tokens_verify_and_tampering_fails():
+    signer = SessionSigner.from_env("k1:first-secret")
+    token, claims = signer.issue("user_1", timedelta(days=7))
+    assert token.startswith("v1.k1.")
+    verified = signer.verify(token)
+    assert (verified.user_id, verified.jti) == ("user_1", claims.jti)
+
+    version, kid, payload, signature = token.split(".")
+    assert signer.verify(".".join([version, kid, payload[:-2] + "AA", signature])) is None
+    assert signer.verify(".".join([version, "k9", payload, signature])) is None
+    assert signer.verify("session_abc") is None
+
+
+def test_rotation_keeps_old_tokens_valid_until_key_is_dropped():
+    old_token, _ = SessionSigner.from_env("k1:first-secret").issue("user_1", timedelta(days=7))
+    rotated = SessionSigner.from_env("k2:second-secret,k1:first-secret")
+    assert rotated.verify(old_token).kid == "k1"
+    assert rotated.issue("user_1", timedelta(days=7))[0].startswith("v1.k2.")
+    assert SessionSigner.from_env("k2:second-secret").verify(old_token) is None
+
+
+def test_expired_tokens_and_bad_key_config_are_rejected():
+    signer = SessionSigner.from_env("k1:first-secret")
+    token, _ = signer.issue("user_1", timedelta(seconds=-1))
+    assert signer.verify(token) is None
+    assert SessionSigner.from_env("") is None
+    with pytest.raises(ValueError):
+        SessionSigner.from_env("missing-secret")
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._iter = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeRevokedSessions:
+    def __init__(self):
+        self.docs = []
+        self.queries = []
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.append(update["$setOnInsert"])
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return FakeCursor([d for d in self.docs if d["expires_at"] > query["expires_at"]["$gt"]])
+
+
+class FakeDB:
+    def __init__(self):
+        self.revoked_sessions = FakeRevokedSessions()
+
+
+def test_revocations_propagate_between_servers_on_sync():
+    db = FakeDB()
+    signer = SessionSigner.from_env("k1:first-secret")
+    _, claims = signer.issue("user_1", timedelta(days=1))
+    _, expired = signer.issue("user_2", timedelta(days=1))
+    expired.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    here, elsewhere = RevocationList(db), RevocationList(db)
+
+    async def scenario():
+        await elsewhere.sync()
+        await here.revoke(claims)
+        await here.revoke(expired)
+        assert here.is_revoked(claims.jti)
+        assert not elsewhere.is_revoked(claims.jti)
+        assert await elsewhere.sync() == 1
+
+    asyncio.run(scenario())
+    assert elsewhere.is_revoked(claims.jti)
+    assert not elsewhere.is_revoked(expired.jti)
+    # After the first full load, syncs only ask for recent revocations
+    assert "revoked_at" not in db.revoked_sessions.queries[0]
+    assert "revoked_at" in db.revoked_sessions.queries[1]
@@ -0,0 +1,64 @@
+import suggest_index
+from suggest_index import SuggestIndex
+
+
+def make_index():
+    index = SuggestIndex()
+    index.rebuild([
+        {"anime_id": "aot", "title": "Attack on Titan", "alt_titles": ["Shingeki no Kyojin"]},
+        {"anime_id": "atla", "title": "Avatar"},
+        {"anime_id": "nar", "title": "Naruto"},
+        {"anime_id": "nars", "title": "Naruto Shippūden"},
+    ])
+    return index
+
+
+def test_matches_any_word_start_and_alternate_titles():
+    index = make_index()
+    assert index.suggest("tit") == ["aot"]
+    assert index.suggest("shingeki") == ["aot"]
+    assert index.suggest("shippu") == ["nars"]
+    assert index.suggest("ttack") == []
+
+
+def test_title_start_ranks_before_later_words_then_popularity_wins():
+    index = make_index()
+    assert index.suggest("n") == ["nar", "nars", "aot"]
+
+    index.set_popularity({"aot": 10.0})
+    assert index.suggest("n") == ["aot", "nar", "nars"]
+
+
+def test_incremental_update_keeps_precomputed_prefixes_consistent(monkeypatch):
+    monkeypatch.setattr(suggest_index, "SUGGEST_SCAN_LIMIT", 1)
+    index = make_index()
+    index.update([{"anime_id": "naz", "title": "Nazo no Kanojo"}], ["nar"])
+
+    assert index.suggest("na") == ["nars", "naz"]
+    assert index.suggest("na", limit=1) == ["nars"]
+    assert len(index) == 4
+
+
+def test_rebuild_keeps_popularity_set_while_it_ran():
+    index = make_index()
+
+    def docs():
+        yield {"anime_id": "nar", "title": "Naruto"}
+        # A trending refresh lands while the rebuild is still indexing
+        index.set_popularity({"aot": 10.0})
+        yield {"anime_id": "aot", "title": "Attack on Titan", "alt_titles": ["Shingeki no Kyojin"]}
+
+    index.rebuild(docs())
+    assert index.suggest("n") == ["aot", "nar"]
+
+
+def test_update_leaves_the_state_readers_hold_untouched():
+    index = make_index()
+    before = index._state
+    entries, titles = list(before.entries), dict(before.titles)
+
+    index.update([{"anime_id": "naz", "title": "Nazo no Kanojo"}], ["nar"])
+
+    assert before.entries == entries
+    assert before.titles == titles
+    assert index.suggest("na") == ["nars", "naz"]
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import math
+import time
+from datetime import datetime, timedelta, timezone
+
+from trending import TrendingTracker
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeTrendingScores:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.bulk_calls = []
+        self.deleted_filters = []
+
+    async def bulk_write(self, ops, ordered=True):
+        self.bulk_calls.append((ops, ordered))
+
+    def find(self, *args, **kwargs):
+        return FakeCursor(self.docs)
+
+    async def delete_many(self, query):
+        self.deleted_filters.append(query)
+
+
+class FakeDB:
+    def __init__(self, docs=()):
+        self.trending_scores = FakeTrendingScores(docs)
+
+
+def test_older_activity_counts_for_less():
+    tracker = TrendingTracker(FakeDB(), half_life_hours=1)
+    now = time.time()
+    tracker.record("fresh", at=now)
+    tracker.record("stale", at=now - 3600)
+    tracker.record("stale", at=now - 3600)
+
+    # Two events one half-life ago weigh as much as one event now
+    assert math.isclose(tracker._pending["stale"], tracker._pending["fresh"])
+
+
+def test_checkpoint_writes_one_unordered_pipeline_upsert_per_anime():
+    db = FakeDB()
+    tracker = TrendingTracker(db)
+    for _ in range(3):
+        tracker.record("anime_1")
+    tracker.record("anime_2")
+
+    assert asyncio.run(tracker.checkpoint()) == 2
+    ops, ordered = db.trending_scores.bulk_calls[0]
+    assert ordered is False
+    assert len(ops) == 2
+    assert tracker.stats()["pending"] == 0
+
+
+def test_refresh_ranks_by_decayed_score_and_publishes():
+    now = datetime.now(timezone.utc)
+    published = []
+    db = FakeDB([
+        {"anime_id": "old_hit", "score": 100.0, "updated_at": now - timedelta(hours=24 * 4)},
+        {"anime_id": "rising", "score": 20.0, "updated_at": now},
+        {"anime_id": "steady", "score": 30.0, "updated_at": now - timedelta(hours=24)},
+    ])
+    tracker = TrendingTracker(db, half_life_hours=24, on_refresh=published.append)
+
+    asyncio.run(tracker.refresh())
+
+    assert tracker.ranking == ["rising", "steady", "old_hit"]
+    assert published == [tracker.scores]
+    assert math.isclose(tracker.scores["old_hit"], 100.0 / 16, rel_tol=1e-3)
+
+
+class FakeSnapshot:
+    def __init__(self, anime_ids):
+        self.position = {anime_id: i for i, anime_id in enumerate(anime_ids)}
+
+    def anime_list_json(self, positions):
+        return json.dumps(list(positions)).encode()
+
+
+def test_payload_is_published_on_refresh_and_snapshot_swap():
+    now = datetime.now(timezone.utc)
+    db = FakeDB([
+        {"anime_id": "b", "score": 5.0, "updated_at": now},
+        {"anime_id": "a", "score": 9.0, "updated_at": now},
+    ])
+    tracker = TrendingTracker(db)
+    first, second = FakeSnapshot(["a", "b"]), FakeSnapshot(["b", "a"])
+
+    async def scenario():
+        await tracker.publish(first)
+        assert tracker.payload(first) is None  # nothing ranked yet
+        await tracker.refresh()
+        assert json.loads(tracker.payload(first).body) == [0, 1]
+        await tracker.publish(second)
+
+    asyncio.run(scenario())
+    # Requests only read: a snapshot nobody published for gets nothing
+    assert tracker.payload(first) is None
+    assert json.loads(tracker.payload(second).body) == [1, 0]
+
+
+class BlockingTrendingScores(FakeTrendingScores):
+    def __init__(self):
+        super().__init__()
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def bulk_write(self, ops, ordered=True):
+        self.started.set()
+        await self.release.wait()
+        await super().bulk_write(ops, ordered)
+
+
+def test_stop_during_checkpoint_keeps_activity():
+    db = FakeDB()
+    db.trending_scores = BlockingTrendingScores()
+
+    async def scenario():
+        tracker = TrendingTracker(db, refresh_interval=3600)
+        tracker.record("anime_1")
+        tracker.start()
+        await db.trending_scores.started.wait()
+        tracker.record("anime_2")
+        stopping = asyncio.create_task(tracker.stop())
+        await asyncio.sleep(0.01)
+        db.trending_scores.release.set()
+        await stopping
+        return tracker
+
+    tracker = asyncio.run(scenario())
+    written = [op._filter["anime_id"] for ops, _ in db.trending_scores.bulk_calls for op in ops]
+    assert sorted(written) == ["anime_1", "anime_2"]
+    assert tracker.stats()["pending"] == 0
@@ -0,0 +1,122 @@
+import asyncio
+
+from watch_buffer import WatchProgressBuffer
+
+
+class FakeBulkCollection:
+    def __init__(self):
+        self.bulk_calls = []
+
+    async def bulk_write(self, ops, ordered=True):
+        self.bulk_calls.append((ops, ordered))
+
+
+class FakeDB:
+    def __init__(self):
+        self.watch_history = FakeBulkCollection()
+        self.episode_progress = FakeBulkCollection()
+
+
+def heartbeat(episode_id, seconds):
+    return {
+        "episode_id": episode_id,
+        "progress_seconds": seconds,
+        "completed": False,
+        "last_watched_at": "2024-01-01T00:00:00+00:00",
+    }
+
+
+def test_heartbeats_coalesce_into_one_unordered_bulk_write():
+    db = FakeDB()
+    buffer = WatchProgressBuffer(db)
+    for seconds in (10, 20, 30):
+        buffer.add("profile_1", "anime_1", heartbeat("episode_1", seconds))
+    buffer.add("profile_1", "anime_2", heartbeat("episode_9", 5))
+
+    assert buffer.pending("profile_1", "anime_1")["progress_seconds"] == 30
+    assert asyncio.run(buffer.flush()) == 4
+    assert len(db.watch_history.bulk_calls) == 1
+    ops, ordered = db.watch_history.bulk_calls[0]
+    assert ordered is False
+    assert len(ops) == 2
+    assert buffer.pending("profile_1", "anime_1") is None
+
+
+def test_episode_progress_is_kept_per_episode():
+    db = FakeDB()
+    buffer = WatchProgressBuffer(db)
+    buffer.add("profile_1", "anime_1", heartbeat("episode_1", 1400))
+    buffer.add("profile_1", "anime_1", heartbeat("episode_2", 60))
+
+    assert buffer.pending("profile_1", "anime_1")["episode_id"] == "episode_2"
+    assert set(buffer.pending_episodes("profile_1", "anime_1")) == {"episode_1", "episode_2"}
+    asyncio.run(buffer.flush())
+    history_ops, _ = db.watch_history.bulk_calls[0]
+    episode_ops, _ = db.episode_progress.bulk_calls[0]
+    assert len(history_ops) == 1
+    assert len(episode_ops) == 2
+
+
+def test_stop_drains_pending_updates():
+    db = FakeDB()
+
+    async def run():
+        buffer = WatchProgressBuffer(db, flush_interval=3600)
+        buffer.start()
+        buffer.add("profile_1", "anime_1", heartbeat("episode_1", 42))
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(run())
+    assert buffer.stats()["written"] == 2
+    assert len(db.watch_history.bulk_calls) == 1
+
+
+def test_discarded_profile_is_not_flushed():
+    db = FakeDB()
+    buffer = WatchProgressBuffer(db)
+    buffer.add("profile_1", "anime_1", heartbeat("episode_1", 10))
+    buffer.add("profile_2", "anime_1", heartbeat("episode_1", 20))
+
+    buffer.discard_profile("profile_1")
+
+    assert buffer.pending_episodes("profile_1", "anime_1") == {}
+    assert asyncio.run(buffer.flush()) == 2
+    ops, _ = db.watch_history.bulk_calls[0]
+    assert [op._filter["profile_id"] for op in ops] == ["profile_2"]
+
+
+class BlockingBulkCollection(FakeBulkCollection):
+    def __init__(self):
+        super().__init__()
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def bulk_write(self, ops, ordered=True):
+        self.started.set()
+        await self.release.wait()
+        await super().bulk_write(ops, ordered)
+
+
+def test_stop_during_inflight_flush_loses_nothing():
+    db = FakeDB()
+    db.watch_history = BlockingBulkCollection()
+
+    async def run():
+        buffer = WatchProgressBuffer(db, flush_interval=3600, max_pending=1)
+        buffer.start()
+        buffer.add("profile_1", "anime_1", heartbeat("episode_1", 42))
+        await db.watch_history.started.wait()
+        # Arrives while the first batch is still being written
+        buffer.add("profile_1", "anime_2", heartbeat("episode_5", 7))
+        stopping = asyncio.create_task(buffer.stop())
+        await asyncio.sleep(0.01)
+        assert not stopping.done()
+        db.watch_history.release.set()
+        await stopping
+        return buffer
+
+    buffer = asyncio.run(run())
+    written = [op._filter["anime_id"] for ops, _ in db.watch_history.bulk_calls for op in ops]
+    assert sorted(written) == ["anime_1", "anime_2"]
+    assert buffer.stats()["pending"] == 0